@@ -30,9 +30,15 @@ class APISettings(BaseSettings):
     host: str = Field("0.0.0.0", env="API_HOST")
     port: int = Field(8000, env="API_PORT")
     debug: bool = Field(False, env="API_DEBUG")
+    workers: int = Field(os.cpu_count() or 1, env="API_WORKERS")
     api_prefix: str = Field("/api/v1", env="API_PREFIX")
     cors_origins: List[str] = Field(["*"], env="API_CORS_ORIGINS")
     
+    @property
+    def server_processes(self) -> int:
+        """Get the number of server worker processes; reload only works with one"""
+        return 1 if self.debug else self.workers
+
     @validator("cors_origins", pre=True)
     def parse_cors_origins(cls, v):
         """Parse CORS origins from string"""
@@ -69,6 +75,9 @@ class StorageSettings(BaseSettings):
     upload_dir: str = Field("uploads", env="UPLOAD_DIR")
     processed_dir: str = Field("processed", env="PROCESSED_DIR")
     temp_dir: str = Field("temp", env="TEMP_DIR")
+    ingest_workers: int = Field(os.cpu_count() or 1, env="INGEST_N_WORKERS")
+    processing_cache_dir: Path = Field("/app/cache/processing", env="PROCESSING_CACHE_DIR")
+    processing_cache_max_bytes: int = Field(1024 ** 3, env="PROCESSING_CACHE_MAX_BYTES")
     
     @validator("document_storage_path", pre=True)
     def create_storage_path(cls, v):
@@ -83,6 +92,9 @@ class OCRSettings(BaseSettings):
     
     engine: str = Field("tesseract", env="OCR_ENGINE")
     languages: List[str] = Field(["eng", "ara"], env="OCR_LANGUAGES")
+    concurrency: int = Field(os.cpu_count() or 1, env="OCR_CONCURRENCY")
+    cache_dir: Path = Field("/app/cache/ocr", env="OCR_CACHE_DIR")
+    cache_max_bytes: int = Field(1024 ** 3, env="OCR_CACHE_MAX_BYTES")
     
     @validator("languages", pre=True)
     def parse_languages(cls, v):
@@ -107,6 +119,7 @@ class ModelSettings(BaseSettings):
     max_training_jobs: int = Field(2, env="MAX_TRAINING_JOBS")
     default_batch_size: int = Field(8, env="DEFAULT_BATCH_SIZE")
     default_learning_rate: float = Field(5e-5, env="DEFAULT_LEARNING_RATE")
+    language_id_model_path: Path = Field("/app/models/lid.176.ftz", env="LANGUAGE_ID_MODEL_PATH")
     
     @validator("storage_path", "cache_path", pre=True)
     def create_path(cls, v):
@@ -124,6 +137,16 @@ class VectorDBSettings(BaseSettings):
     port: int = Field(19530, env="VECTOR_DB_PORT")
     user: str = Field("root", env="VECTOR_DB_USER")
     password: str = Field("milvus", env="VECTOR_DB_PASSWORD")
+    insert_batch_size: int = Field(1000, env="VECTOR_DB_INSERT_BATCH_SIZE")
+
+
+class EmbeddingSettings(BaseSettings):
+    """Embedding model settings"""
+    
+    model_name: str = Field("sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL_NAME")
+    arabic_model_name: str = Field("UBC-NLP/ARBERT", env="EMBEDDING_ARABIC_MODEL_NAME")
+    batch_size: int = Field(32, env="EMBEDDING_BATCH_SIZE")
+    cache_max_entries: int = Field(1_000_000, env="EMBEDDING_CACHE_MAX_ENTRIES")
 
 
 class AgentSettings(BaseSettings):
@@ -156,6 +179,7 @@ class Settings(BaseSettings):
     log: LogSettings = LogSettings()
     model: ModelSettings = ModelSettings()
     vector_db: VectorDBSettings = VectorDBSettings()
+    embedding: EmbeddingSettings = EmbeddingSettings()
     agent: AgentSettings = AgentSettings()
     
     class Config:
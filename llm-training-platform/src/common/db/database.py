@@ -4,7 +4,7 @@ Database connection and session management for the LLM Training Platform.
 
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -47,6 +47,32 @@ def init_db() -> None:
     # Import models to ensure they are registered with the Base
     from src.common.models.user import User, APIKey
     from src.common.models.document import Document, DocumentPage
+    from src.data_structuring.models.dataset import Dataset
+    from src.data_structuring.models.chunk import DocumentChunk
+    from src.data_structuring.embedding.embedding_cache import EmbeddingCache
     
     # Create tables
     Base.metadata.create_all(bind=engine)
+    
+    # Create composite indexes for ownership lookups (user_id = ? AND id = ?).
+    # checkfirst also adds them to databases created before they existed.
+    ownership_indexes = [
+        Index(
+            "ix_documents_user_id_id",
+            Document.user_id,
+            Document.id,
+            postgresql_include=["status"],
+        ),
+        Index("ix_datasets_user_id_id", Dataset.user_id, Dataset.id),
+    ]
+    
+    for index in ownership_indexes:
+        index.create(bind=engine, checkfirst=True)
+    
+    # Chunks are upserted by their position in the document
+    Index(
+        "uq_document_chunks_document_id_position",
+        DocumentChunk.document_id,
+        DocumentChunk.position,
+        unique=True,
+    ).create(bind=engine, checkfirst=True)
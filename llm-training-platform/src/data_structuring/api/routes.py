@@ -2,12 +2,16 @@
 API routes for data structuring service
 """
 
+import json
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import true
 from sqlalchemy.orm import Session
 from loguru import logger
 
-from src.common.db.database import get_db_session_dependency
+from src.common.db.database import SessionLocal, get_db_session_dependency
 from src.common.models.document import Document, DocumentStatus
 from src.common.auth.auth_handler import get_current_active_user
 from src.common.models.user import User
@@ -21,7 +25,8 @@ from src.data_structuring.api.schemas import (
     ErrorResponse,
     ProcessingResponse
 )
-from src.data_structuring.service.structuring_service import StructuringService
+from src.data_structuring.embedding.embedding_service import EmbeddingService, ArabicEmbeddingService
+from src.data_structuring.service.structuring_service import StructuringService, embed_document_chunks
 from src.data_structuring.service.dataset_service import DatasetService
 
 
@@ -32,19 +37,57 @@ router = APIRouter(
 )
 
 
+def _is_privileged(current_user: User) -> bool:
+    """Check whether the user may access resources owned by other users."""
+    return current_user.role in ["ADMIN", "MANAGER"]
+
+
+def _authz_clause(model, current_user: User):
+    """
+    Build a SQL predicate restricting a query to rows the user may access.
+    
+    Rows the user is not allowed to see are filtered out by the database,
+    so callers treat "not permitted" the same as "not found".
+    """
+    if _is_privileged(current_user):
+        return true()
+    return model.user_id == current_user.id
+
+
+def get_embedding_service(request: Request) -> EmbeddingService:
+    """Get the shared embedding service loaded at startup."""
+    return request.app.state.embedding_service
+
+
+def get_arabic_embedding_service(request: Request) -> ArabicEmbeddingService:
+    """Get the shared Arabic embedding service loaded at startup."""
+    return request.app.state.arabic_embedding_service
+
+
 @router.post("/documents/{document_id}/chunk", response_model=ProcessingResponse)
 async def chunk_document(
     document_id: str,
     config: ChunkingConfigRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db_session_dependency)
+    db: Session = Depends(get_db_session_dependency),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+    arabic_embedding_service: ArabicEmbeddingService = Depends(get_arabic_embedding_service)
 ):
     """
     Chunk a document into smaller pieces for processing
+    
+    Chunks are stored before the response is returned; their embeddings are
+    generated in the background, and each chunk's embedding_id is set once
+    it has been indexed.
     """
     try:
-        # Get the document
-        document = db.query(Document).filter(Document.id == document_id).first()
+        # Get the document if the user has access to it
+        document = db.query(Document).filter(
+            Document.id == document_id,
+            _authz_clause(Document, current_user)
+        ).first()
         
         if not document:
             raise HTTPException(
@@ -52,13 +95,6 @@ async def chunk_document(
                 detail=f"Document not found: {document_id}"
             )
         
-        # Check if user has access to the document
-        if document.user_id != current_user.id and current_user.role not in ["ADMIN", "MANAGER"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to access this document"
-            )
-        
         # Check if document is processed
         if document.status != DocumentStatus.PROCESSED:
             raise HTTPException(
@@ -67,14 +103,26 @@ async def chunk_document(
             )
         
         # Chunk the document
-        service = StructuringService(db)
+        service = StructuringService(db, embedding_service, arabic_embedding_service)
         result = await service.chunk_document(
             document_id=document_id,
             chunk_size=config.chunk_size,
             chunk_overlap=config.chunk_overlap,
-            chunk_strategy=config.chunk_strategy
+            chunk_strategy=config.chunk_strategy,
+            embed=False
         )
         
+        if result["success"]:
+            # Embed and index the chunks after the response is sent
+            background_tasks.add_task(
+                embed_document_chunks,
+                document_id,
+                embedding_service,
+                arabic_embedding_service
+            )
+            response.status_code = status.HTTP_202_ACCEPTED
+            result["message"] = f"{result['message']}; embedding queued"
+        
         return ProcessingResponse(
             id=document_id,
             success=result["success"],
@@ -102,8 +150,11 @@ async def get_document_chunks(
     Get all chunks for a document
     """
     try:
-        # Get the document
-        document = db.query(Document).filter(Document.id == document_id).first()
+        # Check that the user has access to the document, without loading its content
+        document = db.query(Document.id).filter(
+            Document.id == document_id,
+            _authz_clause(Document, current_user)
+        ).first()
         
         if not document:
             raise HTTPException(
@@ -111,13 +162,6 @@ async def get_document_chunks(
                 detail=f"Document not found: {document_id}"
             )
         
-        # Check if user has access to the document
-        if document.user_id != current_user.id and current_user.role not in ["ADMIN", "MANAGER"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to access this document"
-            )
-        
         # Get chunks
         service = StructuringService(db)
         chunks = await service.get_document_chunks(document_id)
@@ -148,21 +192,20 @@ async def create_dataset(
     Create a new dataset from documents
     """
     try:
-        # Check if user has access to all documents
+        # Check if user has access to all documents in a single ID-only query
+        accessible_ids = {
+            str(doc_id) for (doc_id,) in db.query(Document.id).filter(
+                Document.id.in_(dataset.document_ids),
+                _authz_clause(Document, current_user)
+            )
+        }
+        
         for doc_id in dataset.document_ids:
-            document = db.query(Document).filter(Document.id == doc_id).first()
-            
-            if not document:
+            if doc_id not in accessible_ids:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Document not found: {doc_id}"
                 )
-            
-            if document.user_id != current_user.id and current_user.role not in ["ADMIN", "MANAGER"]:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"You don't have permission to access document: {doc_id}"
-                )
         
         # Create dataset
         service = DatasetService(db)
@@ -242,7 +285,10 @@ async def get_dataset(
     """
     try:
         service = DatasetService(db)
-        dataset = await service.get_dataset(dataset_id)
+        dataset = await service.get_dataset(
+            dataset_id,
+            user_id=None if _is_privileged(current_user) else current_user.id
+        )
         
         if not dataset:
             raise HTTPException(
@@ -250,13 +296,6 @@ async def get_dataset(
                 detail=f"Dataset not found: {dataset_id}"
             )
         
-        # Check if user has access to the dataset
-        if dataset.user_id != current_user.id and current_user.role not in ["ADMIN", "MANAGER"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to access this dataset"
-            )
-        
         return DatasetResponse(
             id=dataset.id,
             name=dataset.name,
@@ -278,18 +317,21 @@ async def get_dataset(
         )
 
 
-@router.delete("/datasets/{dataset_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_dataset(
+@router.get("/datasets/{dataset_id}/chunks")
+async def get_dataset_chunks(
     dataset_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db_session_dependency)
 ):
     """
-    Delete a dataset
+    Stream all chunks in a dataset as newline-delimited JSON
     """
     try:
         service = DatasetService(db)
-        dataset = await service.get_dataset(dataset_id)
+        dataset = await service.get_dataset(
+            dataset_id,
+            user_id=None if _is_privileged(current_user) else current_user.id
+        )
         
         if not dataset:
             raise HTTPException(
@@ -297,11 +339,50 @@ async def delete_dataset(
                 detail=f"Dataset not found: {dataset_id}"
             )
         
-        # Check if user has access to the dataset
-        if dataset.user_id != current_user.id and current_user.role not in ["ADMIN", "MANAGER"]:
+        def generate_jsonl():
+            # Use a dedicated session, since the request session may be closed
+            # before the response body has been streamed. This is a plain generator,
+            # so StreamingResponse runs the blocking cursor reads in its thread pool
+            stream_db = SessionLocal()
+            
+            try:
+                for chunk in DatasetService(stream_db).get_dataset_chunks(dataset_id):
+                    yield json.dumps(jsonable_encoder(chunk), ensure_ascii=False) + "\n"
+            finally:
+                stream_db.close()
+        
+        return StreamingResponse(generate_jsonl(), media_type="application/x-ndjson")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting dataset chunks: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting dataset chunks: {str(e)}"
+        )
+
+
+@router.delete("/datasets/{dataset_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_dataset(
+    dataset_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session_dependency)
+):
+    """
+    Delete a dataset
+    """
+    try:
+        service = DatasetService(db)
+        dataset = await service.get_dataset(
+            dataset_id,
+            user_id=None if _is_privileged(current_user) else current_user.id
+        )
+        
+        if not dataset:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to delete this dataset"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Dataset not found: {dataset_id}"
             )
         
         # Delete dataset
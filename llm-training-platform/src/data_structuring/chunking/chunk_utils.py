@@ -0,0 +1,26 @@
+"""
+Chunk utility functions for the LLM Training Platform.
+"""
+
+from typing import List, Dict, Any
+
+
+def stale_chunk_positions(existing_texts: Dict[int, str], chunk_rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Find the stored chunk positions that re-chunking does not keep.
+    
+    A stored chunk is kept only if the new chunks have the same text at its
+    position, so a chunk ID always refers to the same text and vector.
+    
+    Args:
+        existing_texts: Text of each stored chunk by position
+        chunk_rows: New chunk rows, with positions 0..N-1
+    
+    Returns:
+        List[int]: Positions past the new chunk count or whose text changed, in order
+    """
+    return sorted(
+        position
+        for position, text in existing_texts.items()
+        if position >= len(chunk_rows) or chunk_rows[position]["text"] != text
+    )
@@ -2,16 +2,66 @@
 Chunking service for the LLM Training Platform.
 """
 
+import asyncio
+import os
 import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional, Union, Tuple
+
+import regex
 from loguru import logger
 
 from src.data_structuring.api.schemas import ChunkStrategy
 
 
+# Boundary patterns, compiled once at import
+_SENTENCE_RE = re.compile(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s')
+_ARABIC_SENTENCE_RE = regex.compile(r'(?<=[\.\!\?؟])[\p{Zs}\p{Cc}]+', regex.UNICODE)
+
+# Paragraph boundary pattern (a blank line, possibly containing whitespace)
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+# Common abbreviations that should not end a sentence
+_ABBREVIATION_RE = re.compile(r'(Mr\.|Mrs\.|Dr\.|Prof\.|etc\.)')
+
+# Sentence end inside an overlap window (a terminator followed by whitespace)
+_OVERLAP_SENTENCE_RE = re.compile(r'[.!?]\s+')
+
+
+def _last_match_end(pattern: re.Pattern, text: str) -> int:
+    """
+    Find the end of the last match of a pattern in text.
+    
+    Iterates the matches without materializing them in a list.
+    
+    Args:
+        pattern: Compiled pattern
+        text: Text to scan
+    
+    Returns:
+        int: Index just after the last match, or -1 if none found
+    """
+    end = -1
+    for match in pattern.finditer(text):
+        end = match.end()
+    return end
+
+
 class ChunkingService:
     """Service for chunking document text."""
     
+    def __init__(self, sentence_pattern: re.Pattern = _SENTENCE_RE, protect_abbreviations: bool = True):
+        """
+        Initialize the chunking service.
+        
+        Args:
+            sentence_pattern: Compiled pattern matching sentence boundaries
+            protect_abbreviations: Whether to avoid splitting at common abbreviations
+        """
+        self.sentence_pattern = sentence_pattern
+        self.protect_abbreviations = protect_abbreviations
+    
     def chunk_text(
         self,
         text: str,
@@ -95,40 +145,45 @@ class ChunkingService:
         # Split text into sentences
         sentences = self._split_into_sentences(text)
         
-        # Combine sentences into chunks
+        # Combine sentences into chunks, accumulating parts in a buffer
+        # and joining once per chunk instead of concatenating per sentence
         chunks = []
-        current_chunk = ""
+        buf: List[str] = []
+        buf_len = 0
         
         for sentence in sentences:
             # If adding the sentence would exceed chunk size, add current chunk to chunks
-            if len(current_chunk) + len(sentence) > chunk_size and current_chunk:
+            if buf_len + len(sentence) > chunk_size and buf:
+                current_chunk = "".join(buf)
                 chunks.append(current_chunk)
+                buf = []
+                buf_len = 0
                 
                 # Start new chunk with overlap
                 if chunk_overlap > 0:
-                    # Find the last few sentences that fit within the overlap
-                    overlap_text = current_chunk[-chunk_overlap:]
                     # Find the last sentence boundary within the overlap
-                    sentence_boundaries = list(re.finditer(r'[.!?]\s+', overlap_text))
-                    if sentence_boundaries:
-                        last_boundary = sentence_boundaries[-1].end()
-                        current_chunk = current_chunk[-chunk_overlap + last_boundary:]
+                    overlap_text = current_chunk[-chunk_overlap:]
+                    last_boundary = _last_match_end(_OVERLAP_SENTENCE_RE, overlap_text)
+                    if last_boundary != -1:
+                        overlap_prefix = current_chunk[-chunk_overlap + last_boundary:]
                     else:
                         # If no sentence boundary found, use the last few words
                         words = overlap_text.split()
-                        if words:
-                            current_chunk = " ".join(words[-min(5, len(words)):])
-                        else:
-                            current_chunk = ""
-                else:
-                    current_chunk = ""
+                        overlap_prefix = " ".join(words[-5:])
+                    
+                    if overlap_prefix:
+                        buf.append(overlap_prefix)
+                        buf_len = len(overlap_prefix)
             
             # Add sentence to current chunk
-            if current_chunk and not current_chunk.endswith(" "):
-                current_chunk += " "
-            current_chunk += sentence
+            if buf and not buf[-1].endswith(" "):
+                buf.append(" ")
+                buf_len += 1
+            buf.append(sentence)
+            buf_len += len(sentence)
         
         # Add the last chunk if not empty
+        current_chunk = "".join(buf)
         if current_chunk.strip():
             chunks.append(current_chunk)
         
@@ -149,40 +204,45 @@ class ChunkingService:
         # Split text into paragraphs
         paragraphs = self._split_into_paragraphs(text)
         
-        # Combine paragraphs into chunks
+        # Combine paragraphs into chunks, accumulating parts in a buffer
+        # and joining once per chunk instead of concatenating per paragraph
         chunks = []
-        current_chunk = ""
+        buf: List[str] = []
+        buf_len = 0
         
         for paragraph in paragraphs:
             # If adding the paragraph would exceed chunk size, add current chunk to chunks
-            if len(current_chunk) + len(paragraph) > chunk_size and current_chunk:
+            if buf_len + len(paragraph) > chunk_size and buf:
+                current_chunk = "".join(buf)
                 chunks.append(current_chunk)
+                buf = []
+                buf_len = 0
                 
                 # Start new chunk with overlap
                 if chunk_overlap > 0:
-                    # Find the last paragraph that fits within the overlap
-                    overlap_text = current_chunk[-chunk_overlap:]
                     # Find the last paragraph boundary within the overlap
-                    paragraph_boundaries = list(re.finditer(r'\n\s*\n', overlap_text))
-                    if paragraph_boundaries:
-                        last_boundary = paragraph_boundaries[-1].end()
-                        current_chunk = current_chunk[-chunk_overlap + last_boundary:]
+                    overlap_text = current_chunk[-chunk_overlap:]
+                    last_boundary = _last_match_end(_PARAGRAPH_RE, overlap_text)
+                    if last_boundary != -1:
+                        overlap_prefix = current_chunk[-chunk_overlap + last_boundary:]
                     else:
                         # If no paragraph boundary found, use the last sentence
                         sentences = self._split_into_sentences(overlap_text)
-                        if sentences:
-                            current_chunk = sentences[-1]
-                        else:
-                            current_chunk = ""
-                else:
-                    current_chunk = ""
+                        overlap_prefix = sentences[-1] if sentences else ""
+                    
+                    if overlap_prefix:
+                        buf.append(overlap_prefix)
+                        buf_len = len(overlap_prefix)
             
             # Add paragraph to current chunk
-            if current_chunk and not current_chunk.endswith("\n\n"):
-                current_chunk += "\n\n"
-            current_chunk += paragraph
+            if buf and not buf[-1].endswith("\n\n"):
+                buf.append("\n\n")
+                buf_len += 2
+            buf.append(paragraph)
+            buf_len += len(paragraph)
         
         # Add the last chunk if not empty
+        current_chunk = "".join(buf)
         if current_chunk.strip():
             chunks.append(current_chunk)
         
@@ -222,13 +282,15 @@ class ChunkingService:
         # For production use, consider using a more sophisticated sentence tokenizer
         
         # Handle common abbreviations to avoid splitting at them
-        text = re.sub(r'(Mr\.|Mrs\.|Dr\.|Prof\.|etc\.)', r'\1<POINT>', text)
+        if self.protect_abbreviations:
+            text = _ABBREVIATION_RE.sub(r'\1<POINT>', text)
         
         # Split on sentence boundaries
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s', text)
+        sentences = self.sentence_pattern.split(text)
         
         # Restore abbreviations
-        sentences = [re.sub(r'<POINT>', '.', s) for s in sentences]
+        if self.protect_abbreviations:
+            sentences = [s.replace('<POINT>', '') for s in sentences]
         
         # Filter out empty sentences
         sentences = [s for s in sentences if s.strip()]
@@ -246,7 +308,7 @@ class ChunkingService:
             List[str]: List of paragraphs
         """
         # Split on paragraph boundaries (one or more newlines)
-        paragraphs = re.split(r'\n\s*\n', text)
+        paragraphs = _PARAGRAPH_RE.split(text)
         
         # Filter out empty paragraphs
         paragraphs = [p for p in paragraphs if p.strip()]
@@ -257,23 +319,120 @@ class ChunkingService:
 class ArabicChunkingService(ChunkingService):
     """Service for chunking Arabic document text."""
     
-    def _split_into_sentences(self, text: str) -> List[str]:
+    def __init__(self):
         """
-        Split Arabic text into sentences.
+        Initialize the Arabic chunking service.
         
-        Args:
-            text: Arabic text to split
-            
-        Returns:
-            List[str]: List of sentences
+        Arabic sentences typically end with a period (.), question mark (؟), or
+        exclamation mark (!), followed by any Unicode space or control character.
         """
-        # Arabic-specific sentence splitting
-        # Arabic sentences typically end with a period (.), question mark (؟), or exclamation mark (!)
-        
-        # Split on sentence boundaries
-        sentences = re.split(r'(?<=\.|\?|!|؟|!) ', text)
-        
-        # Filter out empty sentences
-        sentences = [s for s in sentences if s.strip()]
+        super().__init__(sentence_pattern=_ARABIC_SENTENCE_RE, protect_abbreviations=False)
+
+
+# Per-process chunking services, used by worker processes of the chunk pool
+_chunking_services = {
+    False: ChunkingService(),
+    True: ArabicChunkingService(),
+}
+
+# Global process pool for CPU-bound chunking
+_chunk_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _chunk_text_pure(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    strategy: ChunkStrategy,
+    is_arabic: bool,
+) -> List[str]:
+    """
+    Chunk text in a worker process.
+    
+    Defined at module level so it can be pickled by the process pool.
+    
+    Args:
+        text: Text to chunk
+        chunk_size: Size of each chunk in tokens/characters
+        chunk_overlap: Overlap between chunks in tokens/characters
+        strategy: Chunking strategy
+        is_arabic: Whether to use Arabic sentence splitting
+        
+    Returns:
+        List[str]: List of text chunks
+    """
+    return _chunking_services[is_arabic].chunk_text(
+        text=text,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        strategy=strategy,
+    )
+
+
+def init_chunk_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Initialize the process pool used for chunking.
+    
+    Args:
+        max_workers: Number of worker processes, defaults to the CPU count
         
-        return sentences
+    Returns:
+        ProcessPoolExecutor: Chunking process pool
+    """
+    global _chunk_pool
+    
+    if _chunk_pool is None:
+        max_workers = max_workers or os.cpu_count()
+        # Spawn workers instead of forking: by the first submit this process already
+        # runs the Milvus gRPC channel, torch and tokenizer threads, which are not fork-safe
+        _chunk_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Started chunking process pool with {max_workers} workers.")
+    
+    return _chunk_pool
+
+
+def shutdown_chunk_pool():
+    """Shut down the chunking process pool."""
+    global _chunk_pool
+    
+    if _chunk_pool is not None:
+        _chunk_pool.shutdown(wait=True)
+        _chunk_pool = None
+        logger.info("Stopped chunking process pool.")
+
+
+async def chunk_text_async(
+    text: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    strategy: ChunkStrategy = ChunkStrategy.FIXED_SIZE,
+    is_arabic: bool = False,
+) -> List[str]:
+    """
+    Chunk text in the process pool without blocking the event loop.
+    
+    Args:
+        text: Text to chunk
+        chunk_size: Size of each chunk in tokens/characters
+        chunk_overlap: Overlap between chunks in tokens/characters
+        strategy: Chunking strategy
+        is_arabic: Whether to use Arabic sentence splitting
+        
+    Returns:
+        List[str]: List of text chunks
+    """
+    pool = _chunk_pool or init_chunk_pool()
+    loop = asyncio.get_running_loop()
+    
+    return await loop.run_in_executor(
+        pool,
+        _chunk_text_pure,
+        text,
+        chunk_size,
+        chunk_overlap,
+        strategy,
+        is_arabic,
+    )
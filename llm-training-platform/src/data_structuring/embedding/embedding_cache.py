@@ -0,0 +1,142 @@
+"""
+Embedding cache for the LLM Training Platform.
+
+Embeddings are keyed by the BLAKE2b hash of the text, the embedding model name
+and the model variant (runtime and precision), so re-chunking a document with
+unchanged content skips the model entirely.
+"""
+
+import hashlib
+import itertools
+from typing import List, Dict
+
+import numpy as np
+from sqlalchemy import Column, String, LargeBinary, DateTime, select, update, delete, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.common.config.settings import settings
+from src.common.db.database import Base
+
+
+# Vectors are stored as raw bytes in the dtype returned by generate_embeddings,
+# so a cache hit is bit-identical to the embedding it replaces
+_CACHE_DTYPE = np.float16
+
+# The cache is pruned to its size budget every this many stores per process
+_CACHE_PRUNE_INTERVAL = 100
+_cache_stores = itertools.count()
+
+
+class EmbeddingCache(Base):
+    """Cached embedding of a text under a given model and model variant."""
+    
+    __tablename__ = "embedding_cache"
+    
+    hash = Column(String(64), primary_key=True)
+    model = Column(String(255), primary_key=True)
+    variant = Column(String(64), primary_key=True)
+    vector = Column(LargeBinary, nullable=False)
+    last_used = Column(DateTime, nullable=False, server_default=func.now(), index=True)
+
+
+def text_hash(text: str) -> str:
+    """
+    Compute the cache key of a text.
+    
+    Args:
+        text: Text
+        
+    Returns:
+        str: Hex 256-bit BLAKE2b digest of the text
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=32).hexdigest()
+
+
+def get_cached_embeddings(db: Session, hashes: List[str], model_name: str, variant: str) -> Dict[str, np.ndarray]:
+    """
+    Look up cached embeddings, marking the entries found as recently used.
+    
+    Args:
+        db: Database session
+        hashes: Text hashes to look up
+        model_name: Embedding model name
+        variant: Embedding model variant
+    
+    Returns:
+        Dict[str, np.ndarray]: Embeddings by text hash, for the hashes found
+    """
+    if not hashes:
+        return {}
+    
+    stmt = select(EmbeddingCache.hash, EmbeddingCache.vector).where(
+        EmbeddingCache.hash.in_(set(hashes)),
+        EmbeddingCache.model == model_name,
+        EmbeddingCache.variant == variant,
+    )
+    
+    embeddings = {
+        row.hash: np.frombuffer(row.vector, dtype=_CACHE_DTYPE)
+        for row in db.execute(stmt)
+    }
+    
+    if embeddings:
+        db.execute(
+            update(EmbeddingCache)
+            .where(
+                EmbeddingCache.hash.in_(list(embeddings)),
+                EmbeddingCache.model == model_name,
+                EmbeddingCache.variant == variant,
+            )
+            .values(last_used=func.now())
+        )
+    
+    return embeddings
+
+
+def store_cached_embeddings(db: Session, embeddings: Dict[str, np.ndarray], model_name: str, variant: str) -> None:
+    """
+    Add embeddings to the cache, keeping any entries that already exist.
+    
+    Args:
+        db: Database session
+        embeddings: Embeddings by text hash
+        model_name: Embedding model name
+        variant: Embedding model variant
+    """
+    if not embeddings:
+        return
+    
+    rows = [
+        {
+            "hash": hash_,
+            "model": model_name,
+            "variant": variant,
+            "vector": np.asarray(embedding, dtype=_CACHE_DTYPE).tobytes(),
+        }
+        for hash_, embedding in embeddings.items()
+    ]
+    
+    db.execute(insert(EmbeddingCache).on_conflict_do_nothing(), rows)
+    
+    if next(_cache_stores) % _CACHE_PRUNE_INTERVAL == 0:
+        prune_embedding_cache(db, settings.embedding.cache_max_entries)
+
+
+def prune_embedding_cache(db: Session, max_entries: int) -> None:
+    """
+    Delete the least recently used cache entries over a size budget.
+    
+    Args:
+        db: Database session
+        max_entries: Maximum number of cached embeddings
+    """
+    key = tuple_(EmbeddingCache.hash, EmbeddingCache.model, EmbeddingCache.variant)
+    
+    stale = (
+        select(EmbeddingCache.hash, EmbeddingCache.model, EmbeddingCache.variant)
+        .order_by(EmbeddingCache.last_used.desc())
+        .offset(max_entries)
+    )
+    
+    db.execute(delete(EmbeddingCache).where(key.in_(stale)))
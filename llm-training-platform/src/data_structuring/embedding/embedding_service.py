@@ -3,31 +3,126 @@ Embedding service for the LLM Training Platform.
 """
 
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from typing import List, Dict, Any, Optional, Union
 from loguru import logger
 
 # Import embedding models
 import torch
+import torch.nn.functional as F
 from transformers import AutoTokenizer, AutoModel
 from sentence_transformers import SentenceTransformer
 
+# ONNX Runtime encoder for CPU inference, falling back to PyTorch when not installed
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
+# SIMD similarity kernels, falling back to numpy when not installed
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+
+# Limits for SentenceTransformer encode batches: at most this many texts,
+# shrunk for long texts so a batch stays under the character budget
+_MAX_ENCODE_BATCH_ITEMS = 64
+_MAX_ENCODE_BATCH_CHARS = 64 * 1000
+
+
+def _masked_mean_pool(token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """
+    Mean-pool token embeddings over non-padding tokens.
+    
+    The masked sum is computed as a single batched matmul of the mask against
+    the hidden states, so no expanded [B, S, H] mask tensor is materialized.
+    
+    Args:
+        token_embeddings: Hidden states of shape [B, S, H]
+        attention_mask: Attention mask of shape [B, S]
+        
+    Returns:
+        torch.Tensor: Pooled embeddings of shape [B, H]
+    """
+    mask = attention_mask.to(token_embeddings.dtype)
+    sum_embeddings = torch.bmm(mask.unsqueeze(1), token_embeddings).squeeze(1)
+    sum_mask = torch.clamp(mask.sum(dim=1, keepdim=True), min=1e-9)
+    return sum_embeddings / sum_mask
+
+
+def _embedding_bag_mean_pool(token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """
+    Mean-pool token embeddings over non-padding tokens with a segment reduce.
+    
+    Non-padding tokens are flattened into a [T, H] table and each sequence is
+    reduced as one bag by F.embedding_bag, so padding positions are never
+    read or multiplied.
+    
+    Args:
+        token_embeddings: Hidden states of shape [B, S, H]
+        attention_mask: Attention mask of shape [B, S]
+        
+    Returns:
+        torch.Tensor: Pooled embeddings of shape [B, H]
+    """
+    mask = attention_mask.bool()
+    tokens = token_embeddings[mask]
+    lengths = mask.sum(dim=1)
+    
+    # Bags start where the previous sequence's tokens end
+    offsets = torch.zeros_like(lengths)
+    offsets[1:] = lengths.cumsum(dim=0)[:-1]
+    indices = torch.arange(tokens.size(0), device=tokens.device)
+    
+    return F.embedding_bag(indices, tokens, offsets, mode="mean")
+
 
 class EmbeddingService:
     """Service for generating embeddings from text."""
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 32,
+        quantize_cpu: bool = True,
+    ):
         """
         Initialize the embedding service.
         
         Args:
             model_name: Name of the embedding model to use
+            batch_size: Maximum number of texts per model forward pass
+            quantize_cpu: Quantize the PyTorch encoder's linear layers to INT8 on CPU
         """
         self.model_name = model_name
+        self.batch_size = batch_size
+        self.quantize_cpu = quantize_cpu
+        self.batcher = DynamicBatcher(self)
+        # All tokenization runs on this single thread: a HuggingFace fast tokenizer
+        # raises "Already borrowed" when concurrent embedding calls share it
+        self.tokenizer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tokenizer")
         self.model = None
         self.tokenizer = None
+        self.pad_to_multiple_of = None
+        # Runtime and precision of the loaded model, which change the vectors
+        # produced for the same model name; set by _load_model
+        self.variant = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         
+        # The segment-reduce kernel is the faster pooling on GPU; on CPU the
+        # batched matmul wins since the boolean gather dominates
+        self.mean_pool = _embedding_bag_mean_pool if self.device == "cuda" else _masked_mean_pool
+        
+        # Run the HuggingFace encoder in half precision on GPU, preferring BF16
+        if self.device == "cuda":
+            self.dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        else:
+            self.dtype = torch.float32
+        
         # Initialize model
         self._load_model()
     
@@ -39,30 +134,142 @@ class EmbeddingService:
             # Check if it's a sentence-transformers model
             if "sentence-transformers" in self.model_name or "/" in self.model_name:
                 self.model = SentenceTransformer(self.model_name, device=self.device)
+                self.variant = f"st-{self.device}"
                 logger.info(f"Loaded SentenceTransformer model: {self.model_name}")
             else:
                 # Load HuggingFace model and tokenizer
                 self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-                self.model = AutoModel.from_pretrained(self.model_name).to(self.device)
-                logger.info(f"Loaded HuggingFace model: {self.model_name}")
+                
+                if self.device == "cpu" and ORTModelForFeatureExtraction is not None:
+                    # Export to ONNX Runtime, which fuses encoder ops into optimized CPU kernels
+                    self.model = ORTModelForFeatureExtraction.from_pretrained(
+                        self.model_name,
+                        export=True,
+                        provider="CPUExecutionProvider",
+                    )
+                    self.variant = "ort-cpu"
+                    logger.info(f"Loaded ONNX Runtime model: {self.model_name}")
+                else:
+                    self.model = self._load_hf_model().to(self.device, dtype=self.dtype)
+                    self.model.eval()
+                    self.variant = f"hf-{self.device}-{str(self.dtype).replace('torch.', '')}"
+                    
+                    if self.device == "cuda":
+                        # Compile the encoder and pad inputs to 64-token buckets,
+                        # keeping the set of compiled sequence lengths small
+                        self.model = torch.compile(self.model, mode="reduce-overhead", dynamic=True)
+                        self.pad_to_multiple_of = 64
+                    elif self.quantize_cpu:
+                        # Run linear layers as dynamically quantized INT8 matmuls
+                        self.model = torch.ao.quantization.quantize_dynamic(
+                            self.model,
+                            {torch.nn.Linear},
+                            dtype=torch.qint8,
+                        )
+                        self.variant = "hf-cpu-qint8"
+                    
+                    logger.info(f"Loaded HuggingFace model: {self.model_name} ({self.dtype})")
             
         except Exception as e:
             logger.error(f"Error loading embedding model: {str(e)}")
             raise
     
-    def generate_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+    def _load_hf_model(self):
+        """
+        Load the HuggingFace encoder with fused scaled-dot-product attention.
+        
+        Falls back to the default attention implementation for architectures
+        or transformers versions that don't support SDPA.
+        
+        Returns:
+            PreTrainedModel: Loaded encoder
+        """
+        try:
+            return AutoModel.from_pretrained(
+                self.model_name,
+                attn_implementation="sdpa",
+                torch_dtype=self.dtype,
+            )
+        except (TypeError, ValueError, ImportError) as e:
+            logger.warning(f"SDPA attention not available for {self.model_name}, using default attention: {str(e)}")
+            return AutoModel.from_pretrained(self.model_name, torch_dtype=self.dtype)
+    
+    def warmup(self):
+        """
+        Run a dummy batch through the model.
+        
+        Triggers CUDA context creation, kernel autotuning and graph compilation
+        ahead of the first real request.
+        """
+        try:
+            self.generate_embeddings(["warmup"])
+            logger.info(f"Warmed up embedding model: {self.model_name}")
+        except Exception as e:
+            logger.warning(f"Error warming up embedding model: {str(e)}")
+    
+    def _tokenize(self, texts: List[str]) -> Dict[str, torch.Tensor]:
+        """
+        Tokenize a batch of texts for the HuggingFace encoder.
+        
+        Only called on the tokenizer thread, see tokenizer_pool. On GPU the
+        tensors are placed in pinned host memory so the copy to the device
+        can run asynchronously.
+        
+        Args:
+            texts: Texts to tokenize
+            
+        Returns:
+            Dict[str, torch.Tensor]: Tokenizer outputs
+        """
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=512,
+            pad_to_multiple_of=self.pad_to_multiple_of,
+        )
+        
+        if self.device == "cuda":
+            return {k: v.pin_memory() for k, v in inputs.items()}
+        return dict(inputs)
+    
+    def _encode_batch_size(self, texts: List[str]) -> int:
+        """
+        Pick a SentenceTransformer encode batch size for the given texts.
+        
+        Args:
+            texts: Texts to encode
+            
+        Returns:
+            int: Batch size capped by item count and total characters
+        """
+        avg_chars = max(sum(len(text) for text in texts) // len(texts), 1)
+        return max(1, min(_MAX_ENCODE_BATCH_ITEMS, _MAX_ENCODE_BATCH_CHARS // avg_chars))
+    
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        return_tensor: bool = False,
+    ) -> Union[List[np.ndarray], torch.Tensor]:
         """
         Generate embeddings for a list of texts.
         
+        Embeddings are L2-normalized, so cosine similarity between them is a
+        plain dot product. Numpy embeddings are float16 to halve the bytes
+        moved through the vector store and similarity scoring.
+        
         Args:
             texts: List of texts to generate embeddings for
+            return_tensor: Return a single [N, D] tensor on the model device
+                instead of copying each embedding to a numpy array
             
         Returns:
-            List[np.ndarray]: List of embeddings as numpy arrays
+            Union[List[np.ndarray], torch.Tensor]: Unit-length embeddings (float16 arrays or float32 tensor)
         """
         try:
             if not texts:
-                return []
+                return torch.empty(0) if return_tensor else []
             
             # Check if model is loaded
             if self.model is None:
@@ -71,55 +278,91 @@ class EmbeddingService:
             # Generate embeddings
             if isinstance(self.model, SentenceTransformer):
                 # Use SentenceTransformer
-                embeddings = self.model.encode(texts, convert_to_numpy=True)
-                return list(embeddings)
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=self._encode_batch_size(texts),
+                    convert_to_numpy=not return_tensor,
+                    convert_to_tensor=return_tensor,
+                    normalize_embeddings=True,
+                    show_progress_bar=False,
+                )
+                return embeddings if return_tensor else list(embeddings.astype(np.float16, copy=False))
             else:
-                # Use HuggingFace model
-                embeddings = []
+                # Use HuggingFace model, running each sub-batch in one pass while
+                # the next sub-batch is tokenized on the tokenizer thread.
+                # Texts are sorted by length so each sub-batch pads to similar lengths.
+                order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+                sorted_texts = [texts[i] for i in order]
+                pooled_batches = []
+                batches = [
+                    sorted_texts[start:start + self.batch_size]
+                    for start in range(0, len(sorted_texts), self.batch_size)
+                ]
+                host_inputs = self.tokenizer_pool.submit(self._tokenize, batches[0]).result()
                 
-                for text in texts:
-                    # Tokenize and prepare input
-                    inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                for i in range(len(batches)):
+                    next_inputs = None
+                    if i + 1 < len(batches):
+                        next_inputs = self.tokenizer_pool.submit(self._tokenize, batches[i + 1])
                     
-                    # Generate embedding
-                    with torch.no_grad():
+                    # Copy pinned inputs to the device without blocking the host
+                    inputs = {k: v.to(self.device, non_blocking=True) for k, v in host_inputs.items()}
+                    
+                    # Generate embeddings
+                    with torch.inference_mode(), torch.autocast(
+                        device_type=self.device,
+                        dtype=self.dtype,
+                        enabled=self.device == "cuda",
+                    ):
                         outputs = self.model(**inputs)
                     
-                    # Use mean pooling to get sentence embedding
-                    attention_mask = inputs["attention_mask"]
-                    token_embeddings = outputs.last_hidden_state
+                    # Use mean pooling over non-padding tokens to get sentence embeddings,
+                    # upcasting to float32 since numpy has no bfloat16
+                    pooled = self.mean_pool(outputs.last_hidden_state, inputs["attention_mask"])
+                    pooled = F.normalize(pooled.float(), dim=-1)
                     
-                    input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-                    sum_embeddings = torch.sum(token_embeddings * input_mask_expanded, 1)
-                    sum_mask = torch.clamp(input_mask_expanded.sum(1), min=1e-9)
-                    embedding = (sum_embeddings / sum_mask).squeeze().cpu().numpy()
+                    pooled_batches.append(pooled)
                     
-                    embeddings.append(embedding)
+                    if next_inputs is not None:
+                        host_inputs = next_inputs.result()
+                
+                pooled = torch.cat(pooled_batches)
+                
+                # Restore the input order
+                pooled = pooled[torch.argsort(torch.tensor(order, device=pooled.device))]
                 
-                return embeddings
+                if return_tensor:
+                    return pooled
+                
+                # Copy all embeddings to the host in one transfer and one sync
+                return list(pooled.half().cpu().numpy())
             
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
     
-    def generate_embedding(self, text: str) -> np.ndarray:
+    async def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
         
+        Concurrent calls are coalesced by the dynamic batcher into batched
+        generate_embeddings calls.
+        
         Args:
             text: Text to generate embedding for
             
         Returns:
             np.ndarray: Embedding as numpy array
         """
-        embeddings = self.generate_embeddings([text])
-        return embeddings[0] if embeddings else np.array([])
+        return await self.batcher.submit(text)
     
     def compute_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
         Compute cosine similarity between two embeddings.
         
+        Embeddings are expected to be L2-normalized, as returned by
+        generate_embeddings.
+        
         Args:
             embedding1: First embedding
             embedding2: Second embedding
@@ -127,19 +370,24 @@ class EmbeddingService:
         Returns:
             float: Cosine similarity score
         """
-        # Normalize embeddings
-        embedding1_norm = embedding1 / np.linalg.norm(embedding1)
-        embedding2_norm = embedding2 / np.linalg.norm(embedding2)
+        if simsimd is not None:
+            # SimSIMD returns the cosine distance, with native float16 kernels
+            embedding2 = np.asarray(embedding2, dtype=np.asarray(embedding1).dtype)
+            return 1.0 - float(simsimd.cosine(embedding1, embedding2))
         
-        # Compute cosine similarity
-        similarity = np.dot(embedding1_norm, embedding2_norm)
-        
-        return float(similarity)
+        # Cosine similarity of unit vectors is their dot product, accumulated in float32
+        return float(np.dot(
+            np.asarray(embedding1, dtype=np.float32),
+            np.asarray(embedding2, dtype=np.float32),
+        ))
     
     def compute_similarities(self, query_embedding: np.ndarray, embeddings: List[np.ndarray]) -> List[float]:
         """
         Compute cosine similarities between a query embedding and a list of embeddings.
         
+        Embeddings are expected to be L2-normalized, as returned by
+        generate_embeddings.
+        
         Args:
             query_embedding: Query embedding
             embeddings: List of embeddings to compare against
@@ -147,36 +395,141 @@ class EmbeddingService:
         Returns:
             List[float]: List of cosine similarity scores
         """
-        # Normalize query embedding
-        query_embedding_norm = query_embedding / np.linalg.norm(query_embedding)
+        if len(embeddings) == 0:
+            return []
+        
+        # Stack embeddings into an (N, D) matrix and score them with one matrix-vector product
+        matrix = np.ascontiguousarray(np.stack(embeddings))
         
-        # Compute similarities
-        similarities = []
+        if simsimd is not None:
+            # SimSIMD returns cosine distances for every row in one call,
+            # reading float16 rows directly
+            query = np.ascontiguousarray(query_embedding, dtype=matrix.dtype)[np.newaxis, :]
+            distances = np.asarray(simsimd.cdist(query, matrix, metric="cosine"))
+            return (1.0 - distances[0]).tolist()
         
-        for embedding in embeddings:
-            # Normalize embedding
-            embedding_norm = embedding / np.linalg.norm(embedding)
+        # Score with one matrix-vector product, scaling by reciprocal row norms
+        # computed in a single einsum pass so inputs that aren't exactly unit
+        # length still give cosine scores, as with SimSIMD; numpy has no
+        # float16 BLAS, so accumulate in float32
+        matrix = matrix.astype(np.float32, copy=False)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        inv_norms = np.einsum("nd,nd->n", matrix, matrix)
+        np.sqrt(inv_norms, out=inv_norms)
+        np.maximum(inv_norms, 1e-12, out=inv_norms)
+        np.reciprocal(inv_norms, out=inv_norms)
+        
+        scores = matrix @ query
+        scores *= inv_norms
+        scores /= max(float(np.sqrt(query @ query)), 1e-12)
+        return scores.tolist()
+
+
+class DynamicBatcher:
+    """Coalesces concurrent single-text embedding requests into batches."""
+    
+    def __init__(self, embedding_service: EmbeddingService, max_batch: int = 32, max_wait_ms: int = 20):
+        """
+        Initialize the dynamic batcher.
+        
+        Args:
+            embedding_service: Embedding service that runs the batches
+            max_batch: Maximum number of texts per batch
+            max_wait_ms: Maximum time to wait for a batch to fill, in milliseconds
+        """
+        self.embedding_service = embedding_service
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Start the batching worker on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the batching worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
             
-            # Compute cosine similarity
-            similarity = np.dot(query_embedding_norm, embedding_norm)
-            similarities.append(float(similarity))
+            self._worker = None
+            self._queue = None
+    
+    async def submit(self, text: str) -> np.ndarray:
+        """
+        Queue a text and wait for its embedding.
+        
+        Args:
+            text: Text to generate embedding for
+            
+        Returns:
+            np.ndarray: Embedding as numpy array
+        """
+        await self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches and run them off the event loop."""
+        loop = asyncio.get_running_loop()
         
-        return similarities
+        while True:
+            # Wait for the first request, then collect more until the batch is full or the wait expires
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                
+                if timeout <= 0:
+                    break
+                
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            
+            try:
+                embeddings = await loop.run_in_executor(None, self.embedding_service.generate_embeddings, texts)
+            except Exception as e:
+                logger.error(f"Error generating batched embeddings: {str(e)}")
+                
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
 
 
 # Arabic-specific embedding models
 class ArabicEmbeddingService(EmbeddingService):
     """Service for generating embeddings from Arabic text."""
     
-    def __init__(self, model_name: str = "UBC-NLP/ARBERT"):
+    def __init__(self, model_name: str = "UBC-NLP/ARBERT", batch_size: int = 32):
         """
         Initialize the Arabic embedding service.
         
         Args:
             model_name: Name of the Arabic embedding model to use
+            batch_size: Maximum number of texts per model forward pass
         """
         # Default Arabic models:
         # - UBC-NLP/ARBERT
         # - CAMeL-Lab/bert-base-arabic-camelbert-mix
         # - BAAI/bge-m3
-        super().__init__(model_name=model_name)
+        super().__init__(model_name=model_name, batch_size=batch_size)
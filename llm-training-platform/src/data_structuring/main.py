@@ -42,6 +42,29 @@ async def startup_event():
     from src.data_structuring.vector_store.vector_store import init_vector_store
     await init_vector_store()
     
+    # Start chunking process pool
+    from src.data_structuring.chunking.chunking_service import init_chunk_pool
+    init_chunk_pool()
+    
+    # Load and warm the shared embedding models, then start their request batchers
+    import torch
+    from src.data_structuring.embedding.embedding_service import EmbeddingService, ArabicEmbeddingService
+    
+    torch.backends.cudnn.benchmark = True
+    
+    app.state.embedding_service = EmbeddingService(
+        settings.embedding.model_name,
+        batch_size=settings.embedding.batch_size,
+    )
+    app.state.arabic_embedding_service = ArabicEmbeddingService(
+        settings.embedding.arabic_model_name,
+        batch_size=settings.embedding.batch_size,
+    )
+    
+    for embedding_service in (app.state.embedding_service, app.state.arabic_embedding_service):
+        embedding_service.warmup()
+        await embedding_service.batcher.start()
+    
     logger.info("Data Structuring service started successfully.")
 
 
@@ -49,6 +72,15 @@ async def startup_event():
 async def shutdown_event():
     """Clean up resources on shutdown."""
     logger.info("Shutting down Data Structuring service...")
+    
+    # Stop embedding request batchers
+    for name in ("embedding_service", "arabic_embedding_service"):
+        if hasattr(app.state, name):
+            await getattr(app.state, name).batcher.stop()
+    
+    # Stop chunking process pool
+    from src.data_structuring.chunking.chunking_service import shutdown_chunk_pool
+    shutdown_chunk_pool()
 
 
 @app.get("/health")
@@ -4,10 +4,11 @@ Dataset service for the LLM Training Platform.
 
 import os
 import uuid
-from typing import List, Dict, Any, Optional, Union
+from collections import defaultdict
+from typing import Iterator, List, Dict, Any, Optional, Union
 from loguru import logger
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, insert, select
 
 from src.common.models.document import Document
 from src.data_structuring.models.dataset import Dataset, DatasetChunk
@@ -26,6 +27,71 @@ class DatasetService:
         """
         self.db = db
     
+    def _get_documents(self, document_ids: List[str]) -> List[Document]:
+        """
+        Get documents by ID with a single query, in the requested order.
+        
+        Args:
+            document_ids: List of document IDs
+            
+        Returns:
+            List[Document]: Documents that were found
+        """
+        found = {
+            document.id: document
+            for document in self.db.query(Document).filter(Document.id.in_(document_ids)).all()
+        }
+        
+        documents = []
+        
+        for doc_id in document_ids:
+            document = found.get(doc_id)
+            
+            if not document:
+                logger.warning(f"Document not found: {doc_id}")
+                continue
+            
+            documents.append(document)
+        
+        return documents
+    
+    def _get_chunks_by_document(self, document_ids: List[str]) -> Dict[str, List[DocumentChunk]]:
+        """
+        Get the chunks of several documents with a single query.
+        
+        Args:
+            document_ids: List of document IDs
+            
+        Returns:
+            Dict[str, List[DocumentChunk]]: Chunks grouped by document ID
+        """
+        chunks_by_document = defaultdict(list)
+        
+        for chunk in self.db.query(DocumentChunk).filter(DocumentChunk.document_id.in_(document_ids)).all():
+            chunks_by_document[chunk.document_id].append(chunk)
+        
+        return chunks_by_document
+    
+    def _update_document_metadata(self, dataset: Dataset) -> None:
+        """
+        Refresh the document fields of a dataset's metadata.
+        
+        Args:
+            dataset: Dataset
+        """
+        document_ids, document_names, document_types = [], [], []
+        
+        for doc in dataset.documents:
+            document_ids.append(doc.id)
+            document_names.append(doc.filename)
+            document_types.append(doc.file_type)
+        
+        metadata = dataset.metadata
+        metadata["document_ids"] = document_ids
+        metadata["document_names"] = document_names
+        metadata["document_types"] = document_types
+        dataset.metadata = metadata
+    
     async def create_dataset(
         self,
         name: str,
@@ -47,16 +113,7 @@ class DatasetService:
         """
         try:
             # Validate documents
-            documents = []
-            
-            for doc_id in document_ids:
-                document = self.db.query(Document).filter(Document.id == doc_id).first()
-                
-                if not document:
-                    logger.warning(f"Document not found: {doc_id}")
-                    continue
-                
-                documents.append(document)
+            documents = self._get_documents(document_ids)
             
             if not documents:
                 raise ValueError("No valid documents provided")
@@ -78,32 +135,33 @@ class DatasetService:
             self.db.add(dataset)
             
             # Associate documents with dataset
-            for document in documents:
-                dataset.documents.append(document)
+            dataset.documents.extend(documents)
             
             # Get chunks for documents
-            chunk_count = 0
+            chunks_by_document = self._get_chunks_by_document([doc.id for doc in documents])
+            dataset_chunk_rows = []
             
             for document in documents:
-                chunks = self.db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).all()
+                chunks = chunks_by_document.get(document.id)
                 
                 if not chunks:
                     logger.warning(f"No chunks found for document: {document.id}")
                     continue
                 
                 # Associate chunks with dataset
-                for chunk in chunks:
-                    dataset_chunk = DatasetChunk(
-                        id=str(uuid.uuid4()),
-                        dataset_id=dataset.id,
-                        chunk_id=chunk.id,
-                    )
-                    
-                    self.db.add(dataset_chunk)
-                    chunk_count += 1
+                dataset_chunk_rows.extend(
+                    {"id": str(uuid.uuid4()), "dataset_id": dataset.id, "chunk_id": chunk.id}
+                    for chunk in chunks
+                )
             
             # Update chunk count
-            dataset.chunk_count = chunk_count
+            dataset.chunk_count = len(dataset_chunk_rows)
+            
+            # Flush the dataset so the chunk rows can reference it, then insert them in bulk
+            self.db.flush()
+            
+            if dataset_chunk_rows:
+                self.db.execute(insert(DatasetChunk), dataset_chunk_rows)
             
             self.db.commit()
             
@@ -114,18 +172,24 @@ class DatasetService:
             self.db.rollback()
             raise
     
-    async def get_dataset(self, dataset_id: str) -> Optional[Dataset]:
+    async def get_dataset(self, dataset_id: str, user_id: Optional[str] = None) -> Optional[Dataset]:
         """
         Get a dataset by ID.
         
         Args:
             dataset_id: Dataset ID
+            user_id: If given, only return the dataset when it belongs to this user
             
         Returns:
             Optional[Dataset]: Dataset if found, None otherwise
         """
         try:
-            return self.db.query(Dataset).filter(Dataset.id == dataset_id).first()
+            query = self.db.query(Dataset).filter(Dataset.id == dataset_id)
+            
+            if user_id is not None:
+                query = query.filter(Dataset.user_id == user_id)
+            
+            return query.first()
         except Exception as e:
             logger.error(f"Error getting dataset: {str(e)}")
             return None
@@ -191,43 +255,59 @@ class DatasetService:
             bool: True if successful, False otherwise
         """
         try:
-            # Get dataset
-            dataset = self.db.query(Dataset).filter(Dataset.id == dataset_id).first()
+            # Get dataset with its documents loaded up front
+            dataset = (
+                self.db.query(Dataset)
+                .options(selectinload(Dataset.documents))
+                .filter(Dataset.id == dataset_id)
+                .first()
+            )
             
             if not dataset:
                 logger.warning(f"Dataset not found: {dataset_id}")
                 return False
             
             # Validate documents
-            documents = []
-            
-            for doc_id in document_ids:
-                document = self.db.query(Document).filter(Document.id == doc_id).first()
-                
-                if not document:
-                    logger.warning(f"Document not found: {doc_id}")
-                    continue
-                
-                documents.append(document)
+            documents = self._get_documents(document_ids)
             
             if not documents:
                 logger.warning("No valid documents provided")
                 return False
             
+            # Get chunks for documents not yet in the dataset
+            dataset_document_ids = {doc.id for doc in dataset.documents}
+            chunks_by_document = self._get_chunks_by_document(
+                [doc.id for doc in documents if doc.id not in dataset_document_ids]
+            )
+            
+            # Prefetch which of those chunks are already in the dataset
+            candidate_chunk_ids = [chunk.id for chunks in chunks_by_document.values() for chunk in chunks]
+            existing_chunk_ids = set()
+            
+            if candidate_chunk_ids:
+                existing_chunk_ids = {
+                    chunk_id
+                    for (chunk_id,) in self.db.query(DatasetChunk.chunk_id).filter(
+                        DatasetChunk.dataset_id == dataset.id,
+                        DatasetChunk.chunk_id.in_(candidate_chunk_ids)
+                    )
+                }
+            
             # Add documents to dataset
-            added_count = 0
+            dataset_chunk_rows = []
             
             for document in documents:
                 # Check if document is already in dataset
-                if document in dataset.documents:
+                if document.id in dataset_document_ids:
                     logger.info(f"Document already in dataset: {document.id}")
                     continue
                 
                 # Add document to dataset
                 dataset.documents.append(document)
+                dataset_document_ids.add(document.id)
                 
                 # Get chunks for document
-                chunks = self.db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).all()
+                chunks = chunks_by_document.get(document.id)
                 
                 if not chunks:
                     logger.warning(f"No chunks found for document: {document.id}")
@@ -236,37 +316,27 @@ class DatasetService:
                 # Associate chunks with dataset
                 for chunk in chunks:
                     # Check if chunk is already in dataset
-                    existing = self.db.query(DatasetChunk).filter(
-                        DatasetChunk.dataset_id == dataset.id,
-                        DatasetChunk.chunk_id == chunk.id
-                    ).first()
-                    
-                    if existing:
+                    if chunk.id in existing_chunk_ids:
                         logger.info(f"Chunk already in dataset: {chunk.id}")
                         continue
                     
-                    dataset_chunk = DatasetChunk(
-                        id=str(uuid.uuid4()),
-                        dataset_id=dataset.id,
-                        chunk_id=chunk.id,
+                    dataset_chunk_rows.append(
+                        {"id": str(uuid.uuid4()), "dataset_id": dataset.id, "chunk_id": chunk.id}
                     )
-                    
-                    self.db.add(dataset_chunk)
-                    added_count += 1
                 
                 # Update document count
                 dataset.document_count += 1
             
             # Update chunk count
-            dataset.chunk_count += added_count
+            dataset.chunk_count += len(dataset_chunk_rows)
             
             # Update metadata
             if dataset.metadata:
-                metadata = dataset.metadata
-                metadata["document_ids"] = [doc.id for doc in dataset.documents]
-                metadata["document_names"] = [doc.filename for doc in dataset.documents]
-                metadata["document_types"] = [doc.file_type for doc in dataset.documents]
-                dataset.metadata = metadata
+                self._update_document_metadata(dataset)
+            
+            # Insert new chunk associations in bulk
+            if dataset_chunk_rows:
+                self.db.execute(insert(DatasetChunk), dataset_chunk_rows)
             
             self.db.commit()
             
@@ -293,63 +363,66 @@ class DatasetService:
             bool: True if successful, False otherwise
         """
         try:
-            # Get dataset
-            dataset = self.db.query(Dataset).filter(Dataset.id == dataset_id).first()
+            # Get dataset with its documents loaded up front
+            dataset = (
+                self.db.query(Dataset)
+                .options(selectinload(Dataset.documents))
+                .filter(Dataset.id == dataset_id)
+                .first()
+            )
             
             if not dataset:
                 logger.warning(f"Dataset not found: {dataset_id}")
                 return False
             
+            # Get documents and their chunks
+            documents = self._get_documents(document_ids)
+            chunks_by_document = self._get_chunks_by_document([doc.id for doc in documents])
+            dataset_document_ids = {doc.id for doc in dataset.documents}
+            
             # Remove documents from dataset
-            removed_count = 0
+            removed_chunk_ids = []
             
-            for doc_id in document_ids:
-                # Get document
-                document = self.db.query(Document).filter(Document.id == doc_id).first()
-                
-                if not document:
-                    logger.warning(f"Document not found: {doc_id}")
-                    continue
+            for document in documents:
+                doc_id = document.id
                 
                 # Check if document is in dataset
-                if document not in dataset.documents:
+                if doc_id not in dataset_document_ids:
                     logger.info(f"Document not in dataset: {doc_id}")
                     continue
                 
                 # Remove document from dataset
                 dataset.documents.remove(document)
+                dataset_document_ids.discard(doc_id)
                 
                 # Get chunks for document
-                chunks = self.db.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).all()
+                chunks = chunks_by_document.get(doc_id)
                 
                 if not chunks:
                     logger.warning(f"No chunks found for document: {doc_id}")
                     continue
                 
                 # Remove chunks from dataset
-                for chunk in chunks:
-                    dataset_chunk = self.db.query(DatasetChunk).filter(
-                        DatasetChunk.dataset_id == dataset.id,
-                        DatasetChunk.chunk_id == chunk.id
-                    ).first()
-                    
-                    if dataset_chunk:
-                        self.db.delete(dataset_chunk)
-                        removed_count += 1
+                removed_chunk_ids.extend(chunk.id for chunk in chunks)
                 
                 # Update document count
                 dataset.document_count -= 1
             
+            # Remove chunks from dataset with a single DELETE
+            removed_count = 0
+            
+            if removed_chunk_ids:
+                removed_count = self.db.query(DatasetChunk).filter(
+                    DatasetChunk.dataset_id == dataset.id,
+                    DatasetChunk.chunk_id.in_(removed_chunk_ids)
+                ).delete(synchronize_session=False)
+            
             # Update chunk count
             dataset.chunk_count -= removed_count
             
             # Update metadata
             if dataset.metadata:
-                metadata = dataset.metadata
-                metadata["document_ids"] = [doc.id for doc in dataset.documents]
-                metadata["document_names"] = [doc.filename for doc in dataset.documents]
-                metadata["document_types"] = [doc.file_type for doc in dataset.documents]
-                dataset.metadata = metadata
+                self._update_document_metadata(dataset)
             
             self.db.commit()
             
@@ -384,73 +457,57 @@ class DatasetService:
             logger.error(f"Error getting dataset documents: {str(e)}")
             return []
     
-    async def get_dataset_chunks(self, dataset_id: str) -> List[Dict[str, Any]]:
+    def get_dataset_chunks(self, dataset_id: str) -> Iterator[Dict[str, Any]]:
         """
-        Get all chunks in a dataset.
+        Stream all chunks in a dataset.
+        
+        Rows are read from the database cursor in batches and yielded one at a
+        time, so memory use does not grow with the size of the dataset. The
+        cursor blocks, so this is a plain generator for StreamingResponse to
+        iterate in its thread pool.
         
         Args:
             dataset_id: Dataset ID
             
-        Returns:
-            List[Dict[str, Any]]: List of chunks
+        Yields:
+            Dict[str, Any]: Chunk in response format
         """
+        count = 0
+        
         try:
-            # Get dataset
-            dataset = self.db.query(Dataset).filter(Dataset.id == dataset_id).first()
-            
-            if not dataset:
-                logger.warning(f"Dataset not found: {dataset_id}")
-                return []
-            
-            # Get dataset chunks
-            dataset_chunks = self.db.query(DatasetChunk).filter(DatasetChunk.dataset_id == dataset_id).all()
-            
-            if not dataset_chunks:
-                logger.warning(f"No chunks found for dataset: {dataset_id}")
-                return []
-            
-            # Get chunk IDs
-            chunk_ids = [dc.chunk_id for dc in dataset_chunks]
-            
-            # Get chunks
-            chunks = self.db.query(DocumentChunk).filter(DocumentChunk.id.in_(chunk_ids)).all()
-            
-            # Get document IDs
-            document_ids = list(set(chunk.document_id for chunk in chunks))
-            
-            # Get documents
-            documents = self.db.query(Document).filter(Document.id.in_(document_ids)).all()
-            
-            # Create document lookup
-            document_lookup = {doc.id: doc for doc in documents}
+            # Get dataset chunks with their document names in a single JOIN
+            stmt = (
+                select(DocumentChunk, Document.filename)
+                .join(DatasetChunk, DatasetChunk.chunk_id == DocumentChunk.id)
+                .join(Document, Document.id == DocumentChunk.document_id)
+                .where(DatasetChunk.dataset_id == dataset_id)
+                .order_by(DocumentChunk.document_id, DocumentChunk.position)
+            )
             
-            # Convert to response format
-            result = []
+            result = self.db.execute(stmt, execution_options={"yield_per": 500})
             
-            for chunk in chunks:
-                document = document_lookup.get(chunk.document_id)
-                
-                if not document:
-                    logger.warning(f"Document not found for chunk: {chunk.id}")
-                    continue
+            for chunk, document_name in result:
+                count += 1
                 
-                result.append({
+                yield {
                     "id": chunk.id,
                     "document_id": chunk.document_id,
                     "text": chunk.text,
                     "metadata": {
                         "page_numbers": chunk.page_numbers,
                         "source_document_id": chunk.document_id,
-                        "source_document_name": document.filename,
+                        "source_document_name": document_name,
                         "position": chunk.position,
                         "additional_metadata": chunk.metadata
                     },
                     "embedding_id": chunk.embedding_id,
                     "created_at": chunk.created_at
-                })
-            
-            return result
+                }
             
         except Exception as e:
+            # Re-raise so the streaming response aborts instead of ending as a truncated dataset
             logger.error(f"Error getting dataset chunks: {str(e)}")
-            return []
+            raise
+        
+        if not count:
+            logger.warning(f"No chunks found for dataset: {dataset_id}")
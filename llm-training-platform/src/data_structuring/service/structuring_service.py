@@ -4,33 +4,60 @@ Structuring service for the LLM Training Platform.
 
 import os
 import uuid
+import asyncio
+import numpy as np
 from typing import List, Dict, Any, Optional, Union
 from loguru import logger
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from src.common.config.settings import settings
+from src.common.db.database import SessionLocal
 from src.common.models.document import Document, DocumentStatus
 from src.data_structuring.models.chunk import DocumentChunk
-from src.data_structuring.chunking.chunking_service import ChunkingService, ArabicChunkingService
+from src.data_structuring.chunking.chunking_service import chunk_text_async
+from src.data_structuring.chunking.chunk_utils import stale_chunk_positions
 from src.data_structuring.embedding.embedding_service import EmbeddingService, ArabicEmbeddingService
-from src.data_structuring.vector_store.vector_store import store_embeddings, delete_document_embeddings
+from src.data_structuring.embedding.embedding_cache import text_hash, get_cached_embeddings, store_cached_embeddings
+from src.data_structuring.vector_store.vector_store import store_embeddings, delete_embeddings
 from src.data_structuring.api.schemas import ChunkStrategy
 
 
 class StructuringService:
     """Service for structuring document data."""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        embedding_service: Optional[EmbeddingService] = None,
+        arabic_embedding_service: Optional[ArabicEmbeddingService] = None,
+    ):
         """
         Initialize the structuring service.
         
         Args:
             db: Database session
+            embedding_service: Shared embedding service; loaded on demand if not given
+            arabic_embedding_service: Shared Arabic embedding service; loaded on demand if not given
         """
         self.db = db
-        self.chunking_service = ChunkingService()
-        self.arabic_chunking_service = ArabicChunkingService()
-        self.embedding_service = EmbeddingService()
-        self.arabic_embedding_service = ArabicEmbeddingService()
+        self._embedding_service = embedding_service
+        self._arabic_embedding_service = arabic_embedding_service
+    
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        """Embedding service, loaded on first use if none was provided."""
+        if self._embedding_service is None:
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
+    
+    @property
+    def arabic_embedding_service(self) -> ArabicEmbeddingService:
+        """Arabic embedding service, loaded on first use if none was provided."""
+        if self._arabic_embedding_service is None:
+            self._arabic_embedding_service = ArabicEmbeddingService()
+        return self._arabic_embedding_service
     
     async def chunk_document(
         self,
@@ -38,6 +65,7 @@ class StructuringService:
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
         chunk_strategy: ChunkStrategy = ChunkStrategy.FIXED_SIZE,
+        embed: bool = True,
     ) -> Dict[str, Any]:
         """
         Chunk a document into smaller pieces.
@@ -47,6 +75,8 @@ class StructuringService:
             chunk_size: Size of each chunk in tokens/characters
             chunk_overlap: Overlap between chunks in tokens/characters
             chunk_strategy: Chunking strategy
+            embed: Embed and index the chunks before returning; pass False when
+                embed_and_store_chunks is run separately, e.g. as a background task
             
         Returns:
             Dict[str, Any]: Result of the chunking operation
@@ -80,32 +110,16 @@ class StructuringService:
                     "error": "Document has no content"
                 }
             
-            # Delete existing chunks
-            existing_chunks = self.db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).all()
-            
-            if existing_chunks:
-                logger.info(f"Deleting {len(existing_chunks)} existing chunks for document {document_id}")
-                
-                # Delete from vector store
-                chunk_ids = [chunk.id for chunk in existing_chunks]
-                await delete_document_embeddings(document_id)
-                
-                # Delete from database
-                for chunk in existing_chunks:
-                    self.db.delete(chunk)
-                
-                self.db.commit()
-            
-            # Select chunking service based on document language
-            is_arabic = document.language and document.language.lower() in ["ar", "ara", "arabic"]
-            chunking_service = self.arabic_chunking_service if is_arabic else self.chunking_service
+            # Select sentence splitting based on document language
+            is_arabic = bool(document.language) and document.language.lower() in ["ar", "ara", "arabic"]
             
-            # Chunk document
-            chunks = chunking_service.chunk_text(
+            # Chunk document in the process pool
+            chunks = await chunk_text_async(
                 text=document_text,
                 chunk_size=chunk_size,
                 chunk_overlap=chunk_overlap,
-                strategy=chunk_strategy
+                strategy=chunk_strategy,
+                is_arabic=is_arabic
             )
             
             if not chunks:
@@ -115,18 +129,15 @@ class StructuringService:
                     "error": "No chunks generated"
                 }
             
-            # Create chunks in database
-            db_chunks = []
-            
-            for i, chunk_text in enumerate(chunks):
-                # Create chunk
-                chunk = DocumentChunk(
-                    id=str(uuid.uuid4()),
-                    document_id=document_id,
-                    text=chunk_text,
-                    position=i,
-                    page_numbers=document.page_map.get(i, []) if document.page_map else None,
-                    metadata={
+            # Upsert chunks in the database by position
+            chunk_rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "document_id": document_id,
+                    "text": chunk_text,
+                    "position": i,
+                    "page_numbers": document.page_map.get(i, []) if document.page_map else None,
+                    "metadata": {
                         "chunk_size": chunk_size,
                         "chunk_overlap": chunk_overlap,
                         "chunk_strategy": chunk_strategy.value,
@@ -134,22 +145,91 @@ class StructuringService:
                         "position": i,
                         "total_chunks": len(chunks)
                     }
-                )
+                }
+                for i, chunk_text in enumerate(chunks)
+            ]
+            
+            stale_chunk_ids = await asyncio.to_thread(self._upsert_chunks, document_id, chunk_rows)
+            
+            # Remove the vectors of deleted chunks, whose text changed or is past the new end
+            if stale_chunk_ids:
+                logger.info(f"Deleted {len(stale_chunk_ids)} stale chunks for document {document_id}")
+                await delete_embeddings(stale_chunk_ids)
+            
+            if embed:
+                result = await self.embed_and_store_chunks(document_id)
                 
-                self.db.add(chunk)
-                db_chunks.append(chunk)
+                if not result["success"]:
+                    return result
+            
+            return {
+                "success": True,
+                "message": f"Document chunked successfully: {document_id}",
+                "chunk_count": len(chunks)
+            }
             
-            self.db.commit()
+        except Exception as e:
+            logger.error(f"Error chunking document: {str(e)}")
+            self.db.rollback()
+            
+            return {
+                "success": False,
+                "message": f"Error chunking document: {document_id}",
+                "error": str(e)
+            }
+    
+    async def embed_and_store_chunks(self, document_id: str) -> Dict[str, Any]:
+        """
+        Generate embeddings for a document's chunks and store them in the vector store.
+        
+        Args:
+            document_id: Document ID
+            
+        Returns:
+            Dict[str, Any]: Result of the embedding operation
+        """
+        try:
+            # Get the document fields used in the vector store metadata
+            document = self.db.execute(
+                select(Document.language, Document.filename, Document.file_type)
+                .where(Document.id == document_id)
+            ).first()
+            
+            if not document:
+                return {
+                    "success": False,
+                    "message": f"Document not found: {document_id}",
+                    "error": "Document not found"
+                }
+            
+            # Get chunks
+            chunks = self.db.execute(
+                select(DocumentChunk.id, DocumentChunk.text, DocumentChunk.position, DocumentChunk.page_numbers)
+                .where(DocumentChunk.document_id == document_id)
+                .order_by(DocumentChunk.position)
+            ).all()
+            
+            if not chunks:
+                return {
+                    "success": False,
+                    "message": f"Document has no chunks: {document_id}",
+                    "error": "No chunks to embed"
+                }
             
             # Generate embeddings
+            is_arabic = bool(document.language) and document.language.lower() in ["ar", "ara", "arabic"]
             embedding_service = self.arabic_embedding_service if is_arabic else self.embedding_service
             
-            chunk_texts = [chunk.text for chunk in db_chunks]
-            embeddings = embedding_service.generate_embeddings(chunk_texts)
+            # Run the model and cache lookups off the event loop
+            embeddings = await asyncio.to_thread(
+                self._generate_embeddings,
+                embedding_service,
+                [chunk.text for chunk in chunks]
+            )
             
             # Store embeddings in vector store
-            chunk_ids = [chunk.id for chunk in db_chunks]
-            document_ids = [document_id] * len(db_chunks)
+            chunk_ids = [chunk.id for chunk in chunks]
+            document_ids = [document_id] * len(chunks)
             metadata_list = [
                 {
                     "document_id": document_id,
@@ -160,38 +240,142 @@ class StructuringService:
                     "document_type": document.file_type,
                     "page_numbers": chunk.page_numbers
                 }
-                for chunk in db_chunks
+                for chunk in chunks
             ]
             
             embedding_ids = await store_embeddings(
                 embeddings=embeddings,
                 chunk_ids=chunk_ids,
                 document_ids=document_ids,
-                metadata_list=metadata_list
+                metadata_list=metadata_list,
+                batch_size=settings.vector_db.insert_batch_size
             )
             
-            # Update chunks with embedding IDs
-            for i, chunk in enumerate(db_chunks):
-                chunk.embedding_id = embedding_ids[i]
-            
-            self.db.commit()
+            # Update chunks with embedding IDs in a single bulk UPDATE by primary key
+            await asyncio.to_thread(
+                self._bulk_write,
+                update(DocumentChunk),
+                [
+                    {"id": chunk_id, "embedding_id": embedding_id}
+                    for chunk_id, embedding_id in zip(chunk_ids, embedding_ids)
+                ]
+            )
             
             return {
                 "success": True,
-                "message": f"Document chunked successfully: {document_id}",
+                "message": f"Document chunks embedded successfully: {document_id}",
                 "chunk_count": len(chunks)
             }
             
         except Exception as e:
-            logger.error(f"Error chunking document: {str(e)}")
+            logger.error(f"Error embedding document chunks: {str(e)}")
             self.db.rollback()
             
             return {
                 "success": False,
-                "message": f"Error chunking document: {document_id}",
+                "message": f"Error embedding document chunks: {document_id}",
                 "error": str(e)
             }
     
+    def _upsert_chunks(self, document_id: str, chunk_rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Replace a document's chunks in one transaction.
+        
+        Stored chunks whose text is unchanged at their position keep their
+        chunk ID and embedding, and only their page numbers and metadata are
+        updated. Chunks whose text changed or that are past the new chunk
+        count are deleted, and new rows with new IDs take their positions, so
+        an ID never points at text other than the one it was embedded from.
+        
+        Args:
+            document_id: Document ID
+            chunk_rows: Chunk rows, with positions 0..N-1
+        
+        Returns:
+            List[str]: IDs of the deleted chunks, whose vectors must be removed
+        """
+        # Lock the document's chunks so concurrent re-chunking waits for this one
+        existing_texts = dict(
+            self.db.execute(
+                select(DocumentChunk.position, DocumentChunk.text)
+                .where(DocumentChunk.document_id == document_id)
+                .with_for_update()
+            ).all()
+        )
+        
+        stale_positions = stale_chunk_positions(existing_texts, chunk_rows)
+        
+        stale_chunk_ids = []
+        if stale_positions:
+            stale_chunk_ids = self.db.execute(
+                delete(DocumentChunk)
+                .where(
+                    DocumentChunk.document_id == document_id,
+                    DocumentChunk.position.in_(stale_positions),
+                )
+                .returning(DocumentChunk.id)
+            ).scalars().all()
+        
+        # Remaining conflicts are chunks with unchanged text
+        stmt = pg_insert(DocumentChunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["document_id", "position"],
+            set_={
+                "page_numbers": stmt.excluded["page_numbers"],
+                "metadata": stmt.excluded["metadata"],
+            },
+        )
+        self.db.execute(stmt, chunk_rows)
+        
+        self.db.commit()
+        
+        return stale_chunk_ids
+    
+    def _bulk_write(self, stmt, rows: List[Dict[str, Any]]):
+        """
+        Execute a bulk INSERT or UPDATE with many parameter sets and commit.
+        
+        Args:
+            stmt: Statement to execute
+            rows: Parameter sets, one per row
+        """
+        self.db.execute(stmt, rows)
+        self.db.commit()
+    
+    def _generate_embeddings(self, embedding_service: EmbeddingService, texts: List[str]) -> List[np.ndarray]:
+        """
+        Generate embeddings, reusing cached embeddings of identical texts.
+        
+        Only texts missing from the cache are run through the model, and their
+        embeddings are added to the cache.
+        
+        Args:
+            embedding_service: Embedding service to use for cache misses
+            texts: Texts to generate embeddings for
+            
+        Returns:
+            List[np.ndarray]: Embeddings in the order of the texts
+        """
+        model_name = embedding_service.model_name
+        variant = embedding_service.variant
+        hashes = [text_hash(text) for text in texts]
+        embeddings = get_cached_embeddings(self.db, hashes, model_name, variant)
+        
+        # Embed each missing text once, even if it occurs several times
+        missing = {}
+        for text, hash_ in zip(texts, hashes):
+            if hash_ not in embeddings and hash_ not in missing:
+                missing[hash_] = text
+        
+        logger.info(f"Embedding cache hits: {len(texts) - len(missing)}/{len(texts)}")
+        
+        if missing:
+            new_embeddings = dict(zip(missing, embedding_service.generate_embeddings(list(missing.values()))))
+            store_cached_embeddings(self.db, new_embeddings, model_name, variant)
+            embeddings.update(new_embeddings)
+        
+        return [embeddings[hash_] for hash_ in hashes]
+    
     async def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
         """
         Get all chunks for a document.
@@ -203,37 +387,93 @@ class StructuringService:
             List[Dict[str, Any]]: List of document chunks
         """
         try:
-            # Get document
-            document = self.db.query(Document).filter(Document.id == document_id).first()
+            # Get document name, without loading the document content
+            document_name = self.db.execute(
+                select(Document.filename).where(Document.id == document_id)
+            ).scalar_one_or_none()
             
-            if not document:
+            if document_name is None:
                 logger.error(f"Document not found: {document_id}")
                 return []
             
-            # Get chunks
-            chunks = self.db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).order_by(DocumentChunk.position).all()
+            # Get only the chunk columns used in the response, as plain rows
+            rows = self.db.execute(
+                select(
+                    DocumentChunk.id,
+                    DocumentChunk.document_id,
+                    DocumentChunk.text,
+                    DocumentChunk.page_numbers,
+                    DocumentChunk.position,
+                    DocumentChunk.metadata,
+                    DocumentChunk.embedding_id,
+                    DocumentChunk.created_at,
+                )
+                .where(DocumentChunk.document_id == document_id)
+                .order_by(DocumentChunk.position)
+            ).all()
             
             # Convert to response format
-            result = []
-            
-            for chunk in chunks:
-                result.append({
-                    "id": chunk.id,
-                    "document_id": chunk.document_id,
-                    "text": chunk.text,
+            result = [
+                {
+                    "id": chunk_id,
+                    "document_id": chunk_document_id,
+                    "text": text,
                     "metadata": {
-                        "page_numbers": chunk.page_numbers,
-                        "source_document_id": chunk.document_id,
-                        "source_document_name": document.filename,
-                        "position": chunk.position,
-                        "additional_metadata": chunk.metadata
+                        "page_numbers": page_numbers,
+                        "source_document_id": chunk_document_id,
+                        "source_document_name": document_name,
+                        "position": position,
+                        "additional_metadata": metadata
                     },
-                    "embedding_id": chunk.embedding_id,
-                    "created_at": chunk.created_at
-                })
+                    "embedding_id": embedding_id,
+                    "created_at": created_at
+                }
+                for (
+                    chunk_id,
+                    chunk_document_id,
+                    text,
+                    page_numbers,
+                    position,
+                    metadata,
+                    embedding_id,
+                    created_at,
+                ) in rows
+            ]
             
             return result
             
         except Exception as e:
             logger.error(f"Error getting document chunks: {str(e)}")
             return []
+
+
+async def embed_document_chunks(
+    document_id: str,
+    embedding_service: EmbeddingService,
+    arabic_embedding_service: ArabicEmbeddingService,
+) -> Dict[str, Any]:
+    """
+    Embed and index a document's chunks with a dedicated database session.
+    
+    Intended to run as a background task, after the request session is closed.
+    
+    Args:
+        document_id: Document ID
+        embedding_service: Shared embedding service
+        arabic_embedding_service: Shared Arabic embedding service
+        
+    Returns:
+        Dict[str, Any]: Result of the embedding operation
+    """
+    db = SessionLocal()
+    
+    try:
+        service = StructuringService(db, embedding_service, arabic_embedding_service)
+        result = await service.embed_and_store_chunks(document_id)
+        
+        if not result["success"]:
+            logger.error(f"Background embedding failed for document {document_id}: {result.get('error')}")
+        
+        return result
+    finally:
+        db.close()
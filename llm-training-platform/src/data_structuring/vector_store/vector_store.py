@@ -3,6 +3,7 @@ Vector store module for the LLM Training Platform.
 """
 
 import os
+import json
 import asyncio
 from typing import List, Dict, Any, Optional, Union
 import numpy as np
@@ -23,18 +24,41 @@ from src.common.config.settings import settings
 # Global connection state
 _is_connected = False
 
+# Loaded document chunks collection handle, shared by all operations
+_collection: Optional[Collection] = None
+
+# Embeddings are stored as FLOAT16_VECTOR, halving storage and search bandwidth
+_EMBEDDING_DTYPE = np.float16
+
+# HNSW index on the embedding field
+_INDEX_PARAMS = {
+    "metric_type": "COSINE",
+    "index_type": "HNSW",
+    "params": {"M": 8, "efConstruction": 64},
+}
+
+# HNSW search parameters
+_SEARCH_PARAMS = {
+    "metric_type": "COSINE",
+    "params": {"ef": 64},
+}
+
+# Maximum number of IDs per delete expression, bounding the size Milvus has to parse
+_DELETE_BATCH_SIZE = 500
+
 
 async def init_vector_store():
     """Initialize connection to the vector store."""
-    global _is_connected
+    global _is_connected, _collection
     
     if _is_connected:
         logger.info("Vector store already initialized.")
         return
     
     try:
-        # Connect to Milvus
-        connections.connect(
+        # Connect to Milvus off the event loop
+        await asyncio.to_thread(
+            connections.connect,
             alias="default",
             host=settings.vector_db.host,
             port=settings.vector_db.port,
@@ -47,6 +71,10 @@ async def init_vector_store():
         # Create collections if they don't exist
         await create_collections()
         
+        # Keep one handle to the collection, loaded into memory once for searches
+        _collection = Collection("document_chunks")
+        await asyncio.to_thread(_collection.load)
+        
         _is_connected = True
         logger.info("Vector store initialized successfully.")
         
@@ -58,49 +86,82 @@ async def init_vector_store():
 async def create_collections():
     """Create collections in the vector store if they don't exist."""
     try:
-        # Create document chunks collection
-        if not utility.has_collection("document_chunks"):
-            logger.info("Creating document_chunks collection...")
-            
-            fields = [
-                FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, max_length=36),
-                FieldSchema(name="document_id", dtype=DataType.VARCHAR, max_length=36),
-                FieldSchema(name="chunk_id", dtype=DataType.VARCHAR, max_length=36),
-                FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=settings.vector_db.embedding_dim),
-                FieldSchema(name="metadata", dtype=DataType.JSON),
-            ]
-            
-            schema = CollectionSchema(fields=fields, description="Document chunks embeddings")
-            collection = Collection(name="document_chunks", schema=schema)
-            
-            # Create index
-            index_params = {
-                "metric_type": "COSINE",
-                "index_type": "HNSW",
-                "params": {"M": 8, "efConstruction": 64},
-            }
-            collection.create_index(field_name="embedding", index_params=index_params)
-            logger.info("Created document_chunks collection and index.")
+        await asyncio.to_thread(_create_collections)
         
     except Exception as e:
         logger.error(f"Error creating collections: {str(e)}")
         raise
 
 
+def _create_collections():
+    """Create missing collections, blocking on Milvus."""
+    # Create document chunks collection
+    if not utility.has_collection("document_chunks"):
+        logger.info("Creating document_chunks collection...")
+        
+        fields = [
+            FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, max_length=36),
+            FieldSchema(name="document_id", dtype=DataType.VARCHAR, max_length=36),
+            FieldSchema(name="chunk_id", dtype=DataType.VARCHAR, max_length=36),
+            FieldSchema(name="embedding", dtype=DataType.FLOAT16_VECTOR, dim=settings.vector_db.embedding_dim),
+            FieldSchema(name="metadata", dtype=DataType.JSON),
+        ]
+        
+        schema = CollectionSchema(fields=fields, description="Document chunks embeddings")
+        collection = Collection(name="document_chunks", schema=schema)
+        
+        # Create index
+        collection.create_index(field_name="embedding", index_params=_INDEX_PARAMS)
+        logger.info("Created document_chunks collection and index.")
+    else:
+        _check_embedding_field(Collection("document_chunks"))
+
+
+def _check_embedding_field(collection: Collection):
+    """
+    Check that an existing collection stores embeddings the way they are inserted.
+    
+    Collections created before embeddings were stored as float16 have a
+    FLOAT_VECTOR field, which rejects the float16 upserts.
+    
+    Args:
+        collection: Document chunks collection
+    
+    Raises:
+        ValueError: If the embedding field has another type or dimension
+    """
+    field = next(field for field in collection.schema.fields if field.name == "embedding")
+    dim = field.params.get("dim")
+    
+    if field.dtype != DataType.FLOAT16_VECTOR or int(dim) != settings.vector_db.embedding_dim:
+        raise ValueError(
+            f"The document_chunks collection stores embeddings as {field.dtype.name} with dim={dim}, "
+            f"but FLOAT16_VECTOR with dim={settings.vector_db.embedding_dim} is required. "
+            "Drop the collection and re-embed the documents to migrate it."
+        )
+
+
 async def store_embeddings(
-    embeddings: List[np.ndarray],
+    embeddings: Union[List[np.ndarray], np.ndarray],
     chunk_ids: List[str],
     document_ids: List[str],
     metadata_list: Optional[List[Dict[str, Any]]] = None,
+    batch_size: int = 1000,
+    flush: bool = False,
 ) -> List[str]:
     """
     Store embeddings in the vector store.
     
+    Inserted rows are searchable without a flush; flushing seals the growing
+    segments, which forces a WAL sync, so it is left to Milvus by default.
+    
     Args:
-        embeddings: List of embeddings as numpy arrays
+        embeddings: List of embeddings as numpy arrays, or an (N, D) array
         chunk_ids: List of chunk IDs
         document_ids: List of document IDs
         metadata_list: List of metadata dictionaries
+        batch_size: Maximum number of rows per insert request
+        flush: Flush the collection after inserting
         
     Returns:
         List[str]: List of embedding IDs in the vector store
@@ -109,37 +170,41 @@ async def store_embeddings(
         if not _is_connected:
             await init_vector_store()
         
-        # Prepare data
-        data = []
-        ids = []
-        
-        for i, (embedding, chunk_id, document_id) in enumerate(zip(embeddings, chunk_ids, document_ids)):
-            # Generate ID for the embedding
-            embedding_id = f"{chunk_id}"
-            ids.append(embedding_id)
+        # Stack embeddings into one contiguous float16 matrix
+        if not isinstance(embeddings, np.ndarray):
+            embeddings = np.stack(embeddings)
+        embeddings = np.ascontiguousarray(embeddings, dtype=_EMBEDDING_DTYPE)
+        
+        # Embedding IDs are the chunk IDs
+        ids = list(chunk_ids)
+        document_ids = list(document_ids)
+        
+        # Prepare metadata
+        metadatas = [
+            metadata_list[i] if metadata_list and i < len(metadata_list) else {}
+            for i in range(len(ids))
+        ]
+        
+        def insert_batches():
+            # Upsert data as columns, in the order of the collection schema,
+            # replacing vectors of chunks that are re-embedded under the same ID
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                _collection.upsert([
+                    ids[start:end],
+                    document_ids[start:end],
+                    ids[start:end],
+                    list(embeddings[start:end]),
+                    metadatas[start:end],
+                ])
             
-            # Prepare metadata
-            metadata = metadata_list[i] if metadata_list and i < len(metadata_list) else {}
-            
-            # Add data
-            data.append({
-                "id": embedding_id,
-                "document_id": document_id,
-                "chunk_id": chunk_id,
-                "embedding": embedding.tolist(),
-                "metadata": metadata,
-            })
-        
-        # Get collection
-        collection = Collection("document_chunks")
+            if flush:
+                _collection.flush()
         
-        # Insert data
-        collection.insert(data)
+        # Run the blocking Milvus calls off the event loop
+        await asyncio.to_thread(insert_batches)
         
-        # Flush to ensure data is persisted
-        collection.flush()
-        
-        logger.info(f"Stored {len(embeddings)} embeddings in the vector store.")
+        logger.info(f"Stored {len(ids)} embeddings in the vector store.")
         
         return ids
         
@@ -156,6 +221,9 @@ async def search_similar(
     """
     Search for similar embeddings in the vector store.
     
+    Concurrent searches are coalesced by the search batcher into multi-query
+    Milvus searches.
+    
     Args:
         query_embedding: Query embedding as numpy array
         limit: Maximum number of results to return
@@ -168,46 +236,160 @@ async def search_similar(
         if not _is_connected:
             await init_vector_store()
         
-        # Get collection
-        collection = Collection("document_chunks")
-        collection.load()
-        
-        # Prepare search parameters
-        search_params = {
-            "metric_type": "COSINE",
-            "params": {"ef": 64},
-        }
-        
-        # Execute search
-        results = collection.search(
-            data=[query_embedding.tolist()],
-            anns_field="embedding",
-            param=search_params,
-            limit=limit,
-            expr=filter_expr,
-            output_fields=["document_id", "chunk_id", "metadata"],
-        )
-        
-        # Format results
-        formatted_results = []
-        
-        for hits in results:
-            for hit in hits:
-                formatted_results.append({
-                    "id": hit.id,
-                    "document_id": hit.entity.get("document_id"),
-                    "chunk_id": hit.entity.get("chunk_id"),
-                    "metadata": hit.entity.get("metadata"),
-                    "score": hit.score,
-                })
-        
-        return formatted_results
+        return await _searcher.submit(query_embedding, limit, filter_expr)
         
     except Exception as e:
         logger.error(f"Error searching similar embeddings: {str(e)}")
         raise
 
 
+def _format_hits(hits) -> List[Dict[str, Any]]:
+    """
+    Convert the hits of one query to result dictionaries.
+    
+    Args:
+        hits: Milvus hits for a single query vector
+        
+    Returns:
+        List[Dict[str, Any]]: List of search results
+    """
+    return [
+        {
+            "id": hit.id,
+            "document_id": hit.entity.get("document_id"),
+            "chunk_id": hit.entity.get("chunk_id"),
+            "metadata": hit.entity.get("metadata"),
+            "score": hit.score,
+        }
+        for hit in hits
+    ]
+
+
+class BatchingSearcher:
+    """Coalesces concurrent similarity searches into multi-query Milvus searches."""
+    
+    def __init__(self, max_batch: int = 16, max_wait_ms: int = 5):
+        """
+        Initialize the search batcher.
+        
+        Args:
+            max_batch: Maximum number of queries per batch
+            max_wait_ms: Maximum time to wait for a batch to fill, in milliseconds
+        """
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Start the batching worker on the running event loop, or restart it if it died."""
+        if self._worker is None or self._worker.done():
+            if self._worker is not None and not self._worker.cancelled() and self._worker.exception():
+                logger.error(f"Restarting search batcher after failure: {str(self._worker.exception())}")
+            
+            # Keep queued searches of a dead worker so they are still served
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the batching worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            
+            self._worker = None
+            self._queue = None
+    
+    async def submit(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        filter_expr: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        Queue a search and wait for its results.
+        
+        Args:
+            query_embedding: Query embedding as numpy array
+            limit: Maximum number of results to return
+            filter_expr: Filter expression for the search
+            
+        Returns:
+            List[Dict[str, Any]]: List of search results
+        """
+        await self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        query = np.asarray(query_embedding, dtype=_EMBEDDING_DTYPE)
+        await self._queue.put((query, limit, filter_expr, future))
+        
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches and search them off the event loop."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            # Wait for the first query, then collect more until the batch is full or the wait expires
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                
+                if timeout <= 0:
+                    break
+                
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Queries can only share a search call if they share its limit and filter
+            groups: Dict[tuple, list] = {}
+            for query, limit, filter_expr, future in batch:
+                groups.setdefault((limit, filter_expr), []).append((query, future))
+            
+            for (limit, filter_expr), group in groups.items():
+                try:
+                    results = await asyncio.to_thread(
+                        _collection.search,
+                        data=[query for query, _ in group],
+                        anns_field="embedding",
+                        param=_SEARCH_PARAMS,
+                        limit=limit,
+                        expr=filter_expr,
+                        output_fields=["document_id", "chunk_id", "metadata"],
+                    )
+                except Exception as e:
+                    logger.error(f"Error running batched search: {str(e)}")
+                    
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                # Fail only the query whose hits cannot be formatted, never the worker
+                for (_, future), hits in zip(group, results):
+                    if future.done():
+                        continue
+                    
+                    try:
+                        future.set_result(_format_hits(hits))
+                    except Exception as e:
+                        logger.error(f"Error formatting batched search results: {str(e)}")
+                        future.set_exception(e)
+
+
+# Shared search batcher, started on first use
+_searcher = BatchingSearcher()
+
+
 async def delete_embeddings(chunk_ids: List[str]) -> bool:
     """
     Delete embeddings from the vector store.
@@ -222,14 +404,11 @@ async def delete_embeddings(chunk_ids: List[str]) -> bool:
         if not _is_connected:
             await init_vector_store()
         
-        # Get collection
-        collection = Collection("document_chunks")
-        
-        # Prepare expression
-        expr = f"chunk_id in {chunk_ids}"
-        
-        # Delete data
-        collection.delete(expr)
+        # Delete data off the event loop, as JSON-quoted ID lists of bounded size
+        for start in range(0, len(chunk_ids), _DELETE_BATCH_SIZE):
+            batch = list(chunk_ids[start:start + _DELETE_BATCH_SIZE])
+            expr = f"chunk_id in {json.dumps(batch)}"
+            await asyncio.to_thread(_collection.delete, expr)
         
         logger.info(f"Deleted embeddings for {len(chunk_ids)} chunks from the vector store.")
         
@@ -254,14 +433,11 @@ async def delete_document_embeddings(document_id: str) -> bool:
         if not _is_connected:
             await init_vector_store()
         
-        # Get collection
-        collection = Collection("document_chunks")
-        
         # Prepare expression
-        expr = f'document_id == "{document_id}"'
+        expr = f"document_id == {json.dumps(document_id)}"
         
-        # Delete data
-        collection.delete(expr)
+        # Delete data off the event loop
+        await asyncio.to_thread(_collection.delete, expr)
         
         logger.info(f"Deleted all embeddings for document {document_id} from the vector store.")
         
@@ -274,11 +450,13 @@ async def delete_document_embeddings(document_id: str) -> bool:
 
 async def close_connection():
     """Close connection to the vector store."""
-    global _is_connected
+    global _is_connected, _collection
     
     if _is_connected:
         try:
+            await _searcher.stop()
             connections.disconnect("default")
+            _collection = None
             _is_connected = False
             logger.info("Disconnected from vector store.")
         except Exception as e:
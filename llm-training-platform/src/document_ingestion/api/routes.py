@@ -4,7 +4,7 @@ API routes for document ingestion service
 
 import os
 import uuid
-import shutil
+import asyncio
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
@@ -16,6 +16,7 @@ from src.common.models.document import Document, DocumentStatus
 from src.common.auth.auth_handler import get_current_active_user
 from src.common.models.user import User
 from src.document_ingestion.service.ingestion_service import IngestionService
+from src.document_ingestion.utils.file_utils import get_file_object_size, copy_file_object
 from src.document_ingestion.api.schemas import (
     DocumentResponse, 
     DocumentListResponse,
@@ -25,6 +26,10 @@ from src.document_ingestion.api.schemas import (
 )
 
 
+# Copy uploads in 1 MiB chunks
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+
 router = APIRouter(
     prefix="/documents",
     tags=["documents"],
@@ -44,19 +49,6 @@ async def upload_document(
     Upload a document
     """
     try:
-        # Check file size
-        file_size = 0
-        for chunk in file.file:
-            file_size += len(chunk)
-            if file_size > settings.document.max_file_size_mb * 1024 * 1024:
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"File too large. Maximum size is {settings.document.max_file_size_mb} MB"
-                )
-        
-        # Reset file pointer
-        await file.seek(0)
-        
         # Check file extension
         _, ext = os.path.splitext(file.filename)
         if ext.lower() not in settings.document.allowed_extensions:
@@ -68,10 +60,18 @@ async def upload_document(
         # Create temp directory if it doesn't exist
         os.makedirs(settings.document.temp_dir, exist_ok=True)
         
-        # Save file to temp directory
+        # Check file size; the upload is already spooled, so this reads no data
+        file_size = await asyncio.to_thread(get_file_object_size, file.file)
+        if file_size > settings.document.max_file_size_mb * 1024 * 1024:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Maximum size is {settings.document.max_file_size_mb} MB"
+            )
+        
+        # Save file to temp directory, copying in the kernel where possible
         temp_file_path = os.path.join(settings.document.temp_dir, f"{uuid.uuid4()}{ext}")
         with open(temp_file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+            await asyncio.to_thread(copy_file_object, file.file, f, file_size, _UPLOAD_CHUNK_SIZE)
         
         # Upload document
         service = IngestionService(db)
@@ -103,6 +103,8 @@ async def upload_document(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {str(e)}")
         raise HTTPException(
@@ -145,8 +147,8 @@ async def process_document(
                 detail="Document is already being processed"
             )
         
-        # Process the document
-        result = service.process_document(document_id)
+        # Process the document off the event loop, so other requests are served during OCR
+        result = await asyncio.to_thread(service.process_document, document_id)
         
         # Get updated document
         document = service.get_document(document_id)
@@ -53,6 +53,10 @@ async def startup_event():
     Startup event handler
     """
     logger.info("Document Ingestion Service starting up")
+    
+    # Start OCR process pool
+    from src.document_ingestion.ocr.ocr_worker import init_ocr_pool
+    init_ocr_pool()
 
 
 @app.on_event("shutdown")
@@ -61,6 +65,12 @@ async def shutdown_event():
     Shutdown event handler
     """
     logger.info("Document Ingestion Service shutting down")
+    
+    from src.document_ingestion.ocr.ocr_worker import shutdown_ocr_pool
+    shutdown_ocr_pool()
+    
+    from src.document_ingestion.processors.pdf_processor import shutdown_text_pool
+    shutdown_text_pool()
 
 
 if __name__ == "__main__":
@@ -68,5 +78,8 @@ if __name__ == "__main__":
         "src.document_ingestion.main:app",
         host=settings.api.host,
         port=settings.api.port,
+        loop="uvloop",
+        http="httptools",
+        workers=settings.api.server_processes,
         reload=settings.api.debug
     )
@@ -3,15 +3,192 @@ OCR Engine module for extracting text from images
 """
 
 import os
+import queue
+import hashlib
+import itertools
+import tempfile
+import threading
+from contextlib import contextmanager
 import cv2
 import pytesseract
 import numpy as np
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, Iterator
+from PIL import Image
 from loguru import logger
 import arabic_reshaper
 from bidi.algorithm import get_display
 
+from src.common.config.settings import settings
+from src.document_ingestion.utils.file_utils import prune_cache_dir
+
+# Keep each Tesseract instance single-threaded so that settings.ocr.concurrency
+# is the real degree of parallelism; OpenMP threads per instance on top of
+# concurrent pages oversubscribe the CPU
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# In-process Tesseract API, falling back to the pytesseract CLI wrapper when not installed
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM, RIL, iterate_level
+except ImportError:
+    PyTessBaseAPI = None
+
+
+# Tesseract language codes for each supported language
+_TESSERACT_LANGUAGES = {
+    'ar': 'ara',
+    'en': 'eng',
+    'ar+en': 'ara+eng',
+}
+
+# The OCR cache is pruned to its size budget every this many writes per process
+_CACHE_PRUNE_INTERVAL = 1000
+_cache_writes = itertools.count()
+
+
+def _cache_enabled() -> bool:
+    """
+    Check whether OCR results may be cached
+    
+    Entries hold recognized text in plain form, so the cache is off when
+    encryption at rest is enabled.
+    
+    Returns:
+        bool: True if the OCR cache is enabled
+    """
+    return not settings.security.encryption_master_key
+
+
+def _cache_key(data: bytes, config: str) -> str:
+    """
+    Compute the OCR cache key of image data under an OCR configuration
+    
+    Args:
+        data: Encoded image bytes or raw pixel bytes
+        config: Tesseract configuration used for the image
+        
+    Returns:
+        str: Hex BLAKE2b digest
+    """
+    digest = hashlib.blake2b(data, digest_size=32)
+    digest.update(config.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_path(key: str) -> Path:
+    """
+    Get the cache file path of a key
+    
+    Args:
+        key: Cache key
+        
+    Returns:
+        Path: Cache file path, sharded by the first two hex digits
+    """
+    return Path(settings.ocr.cache_dir) / key[:2] / f"{key}.txt"
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """
+    Look up cached OCR text
+    
+    Args:
+        key: Cache key
+        
+    Returns:
+        Optional[str]: Cached text, or None on a miss
+    """
+    path = _cache_path(key)
+    
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    
+    # Mark the entry as recently used for pruning
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    
+    return text
+
+
+def _cache_put(key: str, text: str) -> None:
+    """
+    Store OCR text in the cache
+    
+    Args:
+        key: Cache key
+        text: OCR text
+    """
+    path = _cache_path(key)
+    
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write to a temporary file and rename, so readers never see partial entries
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+        
+        if next(_cache_writes) % _CACHE_PRUNE_INTERVAL == 0:
+            prune_cache_dir(Path(settings.ocr.cache_dir), settings.ocr.cache_max_bytes)
+    except OSError as e:
+        logger.warning(f"Error writing OCR cache entry: {str(e)}")
+
+
+# Maximum number of images passed to one Tesseract process through a list file;
+# Tesseract tends to stall on much larger lists
+_TESSERACT_BATCH_SIZE = 40
+
+# Pools of persistent Tesseract APIs by language, with up to
+# settings.ocr.concurrency APIs each so pages can be recognized in parallel
+_tesseract_pools = {}
+_tesseract_counts = {}
+_tesseract_pools_lock = threading.Lock()
+
+# Limits concurrent OCR calls across all languages, documents and requests
+_ocr_slots = threading.BoundedSemaphore(settings.ocr.concurrency)
+
+
+@contextmanager
+def _tesseract_api(language: str) -> Iterator["PyTessBaseAPI"]:
+    """
+    Check out a Tesseract API for a language, initializing one if the pool has room
+    
+    Language data is loaded once per pooled API instead of once per image.
+    Waits for an API to be returned when the pool is full.
+    
+    Args:
+        language: Language code
+        
+    Yields:
+        PyTessBaseAPI: API for exclusive use until the context exits
+    """
+    tess_lang = _TESSERACT_LANGUAGES.get(language, _TESSERACT_LANGUAGES['ar'])
+    
+    with _tesseract_pools_lock:
+        pool = _tesseract_pools.setdefault(tess_lang, queue.LifoQueue())
+        create = pool.empty() and _tesseract_counts.get(tess_lang, 0) < settings.ocr.concurrency
+        if create:
+            _tesseract_counts[tess_lang] = _tesseract_counts.get(tess_lang, 0) + 1
+    
+    if create:
+        try:
+            api = PyTessBaseAPI(lang=tess_lang, psm=PSM.AUTO, oem=OEM.LSTM_ONLY)
+        except Exception:
+            with _tesseract_pools_lock:
+                _tesseract_counts[tess_lang] -= 1
+            raise
+    else:
+        api = pool.get()
+    
+    try:
+        yield api
+    finally:
+        pool.put(api)
+
 
 class OCREngine:
     """
@@ -32,84 +209,338 @@ class OCREngine:
             'ar+en': '--psm 3 --oem 1 -l ara+eng',  # Arabic + English
         }
     
-    def process_image(self, image_path: Union[str, Path], language: str = 'ar') -> str:
+    def process_image(
+        self,
+        image: Union[str, Path, np.ndarray],
+        language: str = 'ar',
+        use_cache: bool = True,
+    ) -> str:
         """
         Process an image and extract text using OCR
         
+        Results are cached by the hash of the image file (or pixels) and the
+        OCR configuration, so identical images are recognized only once. The
+        cache is off when encryption at rest is enabled.
+        
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, or an already decoded BGR or grayscale image
             language: Language code ('ar' for Arabic, 'en' for English, 'ar+en' for both)
+            use_cache: Look up and store the result in the OCR cache
             
         Returns:
             str: Extracted text
         """
         try:
-            # Read the image
-            image = cv2.imread(str(image_path))
-            if image is None:
-                logger.error(f"Failed to read image: {image_path}")
-                return ""
-            
-            # Get OCR configuration based on language
             config = self.config.get(language, self.config['ar'])
+            use_cache = use_cache and _cache_enabled()
+            
+            if isinstance(image, np.ndarray):
+                image = np.ascontiguousarray(image)
+                key = _cache_key(image.tobytes(), f"{image.dtype.str}{image.shape}{config}") if use_cache else None
+                data = None
+            else:
+                # Read the image file once, for both hashing and decoding
+                image_path = image
+                with open(image_path, "rb") as f:
+                    data = f.read()
+                
+                key = _cache_key(data, config) if use_cache else None
+            
+            if key is not None:
+                cached = _cache_get(key)
+                if cached is not None:
+                    return cached
+            
+            if data is not None:
+                image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    logger.error(f"Failed to read image: {image_path}")
+                    return ""
             
             # Perform OCR
-            text = pytesseract.image_to_string(image, config=config)
+            text = self._ocr_regions(image, [None], language)[0]
             
             # Handle Arabic text if needed
             if language in ['ar', 'ar+en']:
                 text = self._process_arabic_text(text)
             
-            return text.strip()
+            text = text.strip()
+            
+            if key is not None:
+                _cache_put(key, text)
+            
+            return text
             
         except Exception as e:
             logger.error(f"OCR processing error: {str(e)}")
             return ""
     
-    def process_image_regions(self, image_path: Union[str, Path], regions: list, language: str = 'ar') -> dict:
+    def process_image_regions(
+        self,
+        image: Union[str, Path, np.ndarray],
+        regions: list,
+        language: str = 'ar',
+        use_cache: bool = True,
+    ) -> dict:
         """
         Process specific regions of an image and extract text
         
+        Results are cached per region by the hash of its pixels, so repeated
+        regions such as headers and logos are recognized only once. The cache
+        is off when encryption at rest is enabled.
+        
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, or an already decoded BGR or grayscale image
             regions: List of regions as (x, y, width, height)
             language: Language code
+            use_cache: Look up and store the results in the OCR cache
             
         Returns:
             dict: Dictionary mapping region indices to extracted text
         """
         try:
-            # Read the image
-            image = cv2.imread(str(image_path))
-            if image is None:
-                logger.error(f"Failed to read image: {image_path}")
-                return {}
+            # Read the image unless it was passed decoded
+            if not isinstance(image, np.ndarray):
+                image_path = image
+                image = cv2.imread(str(image_path))
+                if image is None:
+                    logger.error(f"Failed to read image: {image_path}")
+                    return {}
             
-            # Get OCR configuration based on language
+            results = {}
             config = self.config.get(language, self.config['ar'])
+            use_cache = use_cache and _cache_enabled()
             
-            results = {}
+            # Look up regions in the cache by their pixels
+            keys = {}
+            if use_cache:
+                for i, (x, y, w, h) in enumerate(regions):
+                    roi = np.ascontiguousarray(image[y:y+h, x:x+w])
+                    keys[i] = _cache_key(roi.tobytes(), f"{roi.dtype.str}{roi.shape}{config}")
+                    
+                    cached = _cache_get(keys[i])
+                    if cached is not None:
+                        results[i] = cached
             
-            # Process each region
-            for i, (x, y, w, h) in enumerate(regions):
-                # Extract region
-                roi = image[y:y+h, x:x+w]
-                
-                # Perform OCR on region
-                text = pytesseract.image_to_string(roi, config=config)
-                
+            # Perform OCR on the regions missing from the cache
+            missing = [i for i in range(len(regions)) if i not in results]
+            texts = self._ocr_regions(image, [regions[i] for i in missing], language)
+            
+            for i, text in zip(missing, texts):
                 # Handle Arabic text if needed
                 if language in ['ar', 'ar+en']:
                     text = self._process_arabic_text(text)
                 
                 results[i] = text.strip()
+                
+                if use_cache:
+                    _cache_put(keys[i], results[i])
             
-            return results
+            return dict(sorted(results.items()))
             
         except Exception as e:
             logger.error(f"OCR region processing error: {str(e)}")
             return {}
     
+    def process_page_with_boxes(self, image: Union[str, Path, np.ndarray], language: str = 'ar') -> dict:
+        """
+        Extract the text lines of a page and their bounding boxes in one OCR pass
+        
+        Tesseract's own layout analysis finds the lines, which replaces
+        detect_text_regions followed by process_image_regions with a single
+        recognition of the whole page.
+        
+        Args:
+            image: Path to the image file, or an already decoded BGR or grayscale image
+            language: Language code
+            
+        Returns:
+            dict: 'regions' with a (x, y, width, height) box per line and 'texts'
+                with the text of each line
+        """
+        try:
+            if not isinstance(image, np.ndarray):
+                image_path = image
+                image = cv2.imread(str(image_path))
+                if image is None:
+                    logger.error(f"Failed to read image: {image_path}")
+                    return {'regions': [], 'texts': []}
+            
+            with _ocr_slots:
+                regions, texts = self._ocr_lines(image, language)
+            
+            # Handle Arabic text if needed
+            if language in ['ar', 'ar+en']:
+                texts = [self._process_arabic_text(text) for text in texts]
+            
+            return {'regions': regions, 'texts': [text.strip() for text in texts]}
+            
+        except Exception as e:
+            logger.error(f"OCR page processing error: {str(e)}")
+            return {'regions': [], 'texts': []}
+    
+    def _ocr_lines(self, image: np.ndarray, language: str) -> tuple:
+        """
+        Recognize a whole image and collect its text lines
+        
+        Args:
+            image: BGR or grayscale image
+            language: Language code
+            
+        Returns:
+            tuple: List of line boxes as (x, y, width, height) and list of line texts
+        """
+        regions = []
+        texts = []
+        
+        if PyTessBaseAPI is not None:
+            with _tesseract_api(language) as api:
+                if image.ndim == 3:
+                    api.SetImage(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+                else:
+                    api.SetImage(Image.fromarray(image))
+                api.Recognize()
+                
+                for line in iterate_level(api.GetIterator(), RIL.TEXTLINE):
+                    box = line.BoundingBox(RIL.TEXTLINE)
+                    if box is None:
+                        continue
+                    
+                    x1, y1, x2, y2 = box
+                    regions.append((x1, y1, x2 - x1, y2 - y1))
+                    texts.append(line.GetUTF8Text(RIL.TEXTLINE))
+            
+            return regions, texts
+        
+        # Get OCR configuration based on language
+        config = self.config.get(language, self.config['ar'])
+        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        
+        # Group the recognized words by line, merging their boxes
+        lines = {}
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            x, y = data['left'][i], data['top'][i]
+            w, h = data['width'][i], data['height'][i]
+            
+            if key in lines:
+                box, words = lines[key]
+                lines[key] = (
+                    (min(box[0], x), min(box[1], y), max(box[2], x + w), max(box[3], y + h)),
+                    words,
+                )
+                words.append(word)
+            else:
+                lines[key] = ((x, y, x + w, y + h), [word])
+        
+        for (x1, y1, x2, y2), words in lines.values():
+            regions.append((x1, y1, x2 - x1, y2 - y1))
+            texts.append(" ".join(words))
+        
+        return regions, texts
+    
+    def _ocr_regions(self, image: np.ndarray, regions: list, language: str) -> list:
+        """
+        Run OCR on regions of an image
+        
+        With tesserocr, the image is set once on a pooled API for the language
+        and each region is recognized by restricting the API to its rectangle.
+        Otherwise the regions are written to a temporary directory and passed
+        to a single pytesseract call per batch through an image list file, so
+        the language data is loaded once per batch instead of once per region.
+        At most settings.ocr.concurrency calls run at once in the process.
+        
+        Args:
+            image: BGR or grayscale image
+            regions: List of regions as (x, y, width, height), or None for the whole image
+            language: Language code
+            
+        Returns:
+            list: Extracted text for each region
+        """
+        with _ocr_slots:
+            return self._ocr_regions_unlimited(image, regions, language)
+    
+    def _ocr_regions_unlimited(self, image: np.ndarray, regions: list, language: str) -> list:
+        """
+        Run OCR on regions of an image without taking an OCR slot
+        
+        Args:
+            image: BGR or grayscale image
+            regions: List of regions as (x, y, width, height), or None for the whole image
+            language: Language code
+            
+        Returns:
+            list: Extracted text for each region
+        """
+        if PyTessBaseAPI is not None:
+            with _tesseract_api(language) as api:
+                if image.ndim == 3:
+                    api.SetImage(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+                else:
+                    api.SetImage(Image.fromarray(image))
+                
+                texts = []
+                for region in regions:
+                    if region is not None:
+                        api.SetRectangle(*region)
+                    texts.append(api.GetUTF8Text())
+                
+                return texts
+        
+        # Get OCR configuration based on language
+        config = self.config.get(language, self.config['ar'])
+        
+        rois = []
+        for region in regions:
+            if region is None:
+                rois.append(image)
+            else:
+                x, y, w, h = region
+                rois.append(image[y:y+h, x:x+w])
+        
+        if len(rois) == 1:
+            return [pytesseract.image_to_string(rois[0], config=config)]
+        
+        texts = []
+        for start in range(0, len(rois), _TESSERACT_BATCH_SIZE):
+            texts.extend(self._ocr_batch(rois[start:start + _TESSERACT_BATCH_SIZE], config))
+        
+        return texts
+    
+    def _ocr_batch(self, rois: list, config: str) -> list:
+        """
+        Run OCR on a batch of images with a single Tesseract process
+        
+        Args:
+            rois: List of images
+            config: Tesseract configuration
+            
+        Returns:
+            list: Extracted text for each image
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for i, roi in enumerate(rois):
+                path = os.path.join(tmp_dir, f"roi_{i}.png")
+                cv2.imwrite(path, roi)
+                paths.append(path)
+            
+            list_path = os.path.join(tmp_dir, "list.txt")
+            with open(list_path, "w") as f:
+                f.write("\n".join(paths) + "\n")
+            
+            output = pytesseract.image_to_string(list_path, config=config)
+        
+        # Tesseract terminates each page with a form feed
+        texts = output.split("\f")[:len(rois)]
+        texts.extend([""] * (len(rois) - len(texts)))
+        
+        return texts
+    
     def _process_arabic_text(self, text: str) -> str:
         """
         Process Arabic text for correct display
@@ -0,0 +1,100 @@
+"""
+OCR worker process pool for recognizing document pages in parallel
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+from loguru import logger
+
+from src.common.config.settings import settings
+from src.document_ingestion.ocr.ocr_engine import OCREngine
+from src.document_ingestion.preprocessing.image_preprocessor import ImagePreprocessor
+
+# Per-process preprocessor and OCR engine, created by the pool initializer
+_image_preprocessor: Optional[ImagePreprocessor] = None
+_ocr_engine: Optional[OCREngine] = None
+
+# Global process pool for CPU-bound page preprocessing and OCR
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_ocr_worker():
+    """
+    Initialize an OCR worker process
+    
+    Each worker runs single-threaded Tesseract and keeps its own preprocessor
+    and OCR engine, whose pooled Tesseract API is reused for every page.
+    """
+    global _image_preprocessor, _ocr_engine
+    
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    
+    _image_preprocessor = ImagePreprocessor()
+    _ocr_engine = OCREngine()
+
+
+def ocr_page(image_path: Union[str, Path], language: str) -> str:
+    """
+    Preprocess a page image and extract its text in a worker process
+    
+    Defined at module level so it can be pickled by the process pool.
+    
+    Args:
+        image_path: Path to the page image
+        language: Language code
+    
+    Returns:
+        str: Extracted text
+    """
+    if _ocr_engine is None:
+        _init_ocr_worker()
+    
+    # Preprocess the image, falling back to the original page on failure
+    enhanced_image = _image_preprocessor.preprocess(image_path)
+    if enhanced_image is None:
+        enhanced_image = image_path
+    
+    # Perform OCR on the enhanced image in memory
+    return _ocr_engine.process_image(enhanced_image, language=language)
+
+
+def init_ocr_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Initialize the process pool used for OCR
+    
+    Every server process starts its own pool, so by default settings.ocr.concurrency
+    is split between them to keep it the total number of OCR processes.
+    Workers are spawned rather than forked, since the server process already
+    runs the event loop and other threads when the pool first starts workers.
+    
+    Args:
+        max_workers: Number of worker processes, defaults to this server process's share of settings.ocr.concurrency
+    
+    Returns:
+        ProcessPoolExecutor: OCR process pool
+    """
+    global _ocr_pool
+    
+    if _ocr_pool is None:
+        max_workers = max_workers or max(1, settings.ocr.concurrency // settings.api.server_processes)
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_ocr_worker,
+        )
+        logger.info(f"Started OCR process pool with {max_workers} workers.")
+    
+    return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    """Shut down the OCR process pool."""
+    global _ocr_pool
+    
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(wait=True)
+        _ocr_pool = None
+        logger.info("Stopped OCR process pool.")
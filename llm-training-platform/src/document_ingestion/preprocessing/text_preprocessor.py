@@ -5,17 +5,138 @@ Text Preprocessor module for cleaning and normalizing extracted text
 import re
 import string
 import unicodedata
+from functools import lru_cache
 from typing import List, Optional
 from loguru import logger
 
+import numpy as np
+
 import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
+from nltk.tokenize import NLTKWordTokenizer
 from nltk.corpus import stopwords
 import pyarabic.araby as araby
 from camel_tools.utils.normalize import normalize_unicode, normalize_alef, normalize_alef_maksura
 from camel_tools.utils.dediac import dediac_ar
 
 
+@lru_cache(maxsize=None)
+def _printable_mask() -> np.ndarray:
+    """
+    Build the lookup table of characters kept by remove_ocr_artifacts
+    
+    Built on first use, since checking every code point takes a fraction of a second.
+    
+    Returns:
+        np.ndarray: Boolean mask indexed by code point, True for printable or whitespace characters
+    """
+    return np.fromiter(
+        (chr(cp).isprintable() or chr(cp).isspace() for cp in range(0x110000)),
+        dtype=bool,
+        count=0x110000,
+    )
+
+
+# Isolated word characters (likely OCR errors) or runs of a repeated punctuation mark
+_OCR_ARTIFACT_RE = re.compile(r'(?<!\w)\w(?!\w)|([^\w\s])\1+')
+
+# Spaces around punctuation
+_PUNCTUATION_SPACING_RE = re.compile(r'\s*([,.!?;:])\s*')
+
+# Periods directly followed by a Latin letter
+_PERIOD_SPACING_RE = re.compile(r'\.(?=[A-Za-z])')
+
+# Typographic quotes and dashes mapped to their ASCII forms
+_PUNCTUATION_TRANS = str.maketrans({
+    '“': '"', '”': '"', '„': '"',
+    '‘': "'", '’': "'", '‚': "'",
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '―': '-',
+})
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# '0' or '1' between Latin letters, likely a misread 'o' or 'l'
+_DIGIT_IN_WORD_RE = re.compile(r'(?<=[A-Za-z])[01](?=[A-Za-z])')
+_DIGIT_LETTERS = {'0': 'o', '1': 'l'}
+
+
+def _replace_ocr_artifact(match: "re.Match") -> str:
+    """
+    Replace a match of _OCR_ARTIFACT_RE
+    
+    Args:
+        match: Regex match
+    
+    Returns:
+        str: The punctuation mark for repeated punctuation, a space for an isolated character
+    """
+    return match.group(1) or ' '
+
+
+def _replace_digit_in_word(match: "re.Match") -> str:
+    """
+    Replace a match of _DIGIT_IN_WORD_RE
+    
+    Args:
+        match: Regex match
+    
+    Returns:
+        str: The letter the digit was likely misread from
+    """
+    return _DIGIT_LETTERS[match.group(0)]
+
+
+# Punkt tokenizer class of NLTK 3.8.2+; older versions load a pickled tokenizer
+try:
+    from nltk.tokenize import PunktTokenizer as _PunktTokenizer
+except ImportError:
+    _PunktTokenizer = None
+
+# Whether the NLTK resources have been checked in this process
+_nltk_resources_checked = False
+
+
+def _ensure_nltk_resources() -> None:
+    """
+    Download NLTK resources if needed, once per process
+    """
+    global _nltk_resources_checked
+    
+    if _nltk_resources_checked:
+        return
+    
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+    
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+    
+    # NLTK 3.8.2+ loads Punkt from the pickle-free punkt_tab resource
+    if _PunktTokenizer is not None:
+        try:
+            nltk.data.find('tokenizers/punkt_tab')
+        except LookupError:
+            nltk.download('punkt_tab')
+    
+    _nltk_resources_checked = True
+
+
+def _load_sentence_tokenizer():
+    """
+    Load the pretrained English Punkt sentence tokenizer used by sent_tokenize
+    
+    Returns:
+        Punkt sentence tokenizer
+    """
+    if _PunktTokenizer is not None:
+        return _PunktTokenizer('english')
+    
+    return nltk.data.load('tokenizers/punkt/english.pickle')
+
+
 class TextPreprocessor:
     """
     Class for preprocessing text, with special handling for Arabic text
@@ -25,16 +146,18 @@ class TextPreprocessor:
         """
         Initialize Text Preprocessor
         """
-        # Download NLTK resources if needed
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
+        _ensure_nltk_resources()
         
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
+        # Load stopword sets once instead of on every call
+        self._stopwords = {
+            'ar': frozenset(stopwords.words('arabic')),
+            'en': frozenset(stopwords.words('english')),
+        }
+        
+        # Keep tokenizer instances instead of resolving them through
+        # sent_tokenize / word_tokenize on every call
+        self._sentence_tokenizer = _load_sentence_tokenizer()
+        self._word_tokenizer = NLTKWordTokenizer()
     
     def preprocess(self, text: str, language: str = 'ar') -> str:
         """
@@ -147,18 +270,18 @@ class TextPreprocessor:
             str: Text with OCR artifacts removed
         """
         try:
-            # Remove non-printable characters
-            text = ''.join(c for c in text if c.isprintable() or c.isspace())
+            # Remove non-printable characters with a vectorized lookup over the code points
+            code_points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+            keep = _printable_mask()[code_points]
+            if not keep.all():
+                text = code_points[keep].tobytes().decode('utf-32-le')
             
-            # Remove isolated characters that are likely OCR errors
-            text = re.sub(r'(?<!\w)[\w](?!\w)', ' ', text)
+            # Replace isolated characters that are likely OCR errors with a space
+            # and collapse repeated punctuation, in one pass
+            text = _OCR_ARTIFACT_RE.sub(_replace_ocr_artifact, text)
             
-            # Remove repeated punctuation
-            text = re.sub(r'([^\w\s])\1+', r'\1', text)
-            
-            # Fix common OCR errors
-            text = text.replace('0', 'o')  # Replace '0' with 'o' when it's likely a letter
-            text = text.replace('1', 'l')  # Replace '1' with 'l' when it's likely a letter
+            # Fix common OCR errors: '0' and '1' read in place of 'o' and 'l' inside words
+            text = _DIGIT_IN_WORD_RE.sub(_replace_digit_in_word, text)
             
             return text
             
@@ -178,17 +301,13 @@ class TextPreprocessor:
         """
         try:
             # Normalize spaces around punctuation
-            text = re.sub(r'\s*([,.!?;:])\s*', r'\1 ', text)
-            
-            # Normalize quotes
-            text = re.sub(r'["""]', '"', text)
-            text = re.sub(r"[''']", "'", text)
+            text = _PUNCTUATION_SPACING_RE.sub(r'\1 ', text)
             
-            # Normalize dashes
-            text = re.sub(r'[-‐‑‒–—―]', '-', text)
+            # Normalize quotes and dashes
+            text = text.translate(_PUNCTUATION_TRANS)
             
             # Fix spacing after periods
-            text = re.sub(r'\.(?=[A-Za-z])', '. ', text)
+            text = _PERIOD_SPACING_RE.sub('. ', text)
             
             return text
             
@@ -207,14 +326,8 @@ class TextPreprocessor:
             str: Text with normalized whitespace
         """
         try:
-            # Replace multiple spaces with a single space
-            text = re.sub(r'\s+', ' ', text)
-            
-            # Remove spaces at the beginning and end of each line
-            text = re.sub(r'^ +| +$', '', text, flags=re.MULTILINE)
-            
-            # Normalize line breaks
-            text = re.sub(r'\n+', '\n', text)
+            # Replace runs of whitespace, including line breaks, with a single space
+            text = _WHITESPACE_RE.sub(' ', text)
             
             return text.strip()
             
@@ -239,7 +352,12 @@ class TextPreprocessor:
                 tokens = araby.tokenize(text)
             else:
                 # Use NLTK tokenization
-                tokens = word_tokenize(text)
+                # Same as word_tokenize: split into sentences, then into words
+                tokens = [
+                    token
+                    for sentence in self._sentence_tokenizer.tokenize(text)
+                    for token in self._word_tokenizer.tokenize(sentence)
+                ]
             
             return tokens
             
@@ -259,13 +377,8 @@ class TextPreprocessor:
             List[str]: Tokens with stopwords removed
         """
         try:
-            if language == 'ar':
-                # Get Arabic stopwords
-                stop_words = set(stopwords.words('arabic'))
-            elif language == 'en':
-                # Get English stopwords
-                stop_words = set(stopwords.words('english'))
-            else:
+            stop_words = self._stopwords.get(language)
+            if stop_words is None:
                 # Default to no stopwords
                 return tokens
             
@@ -291,7 +404,7 @@ class TextPreprocessor:
         """
         try:
             # Use NLTK sentence tokenization
-            sentences = sent_tokenize(text)
+            sentences = self._sentence_tokenizer.tokenize(text)
             
             return sentences
             
@@ -3,16 +3,148 @@ DOCX Processor module for handling Word documents
 """
 
 import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional, Union
 from loguru import logger
 
 import docx
 from docx.document import Document as DocxDocument
-from docx.oxml.table import CT_Tbl
-from docx.oxml.text.paragraph import CT_P
-from docx.table import Table
-from docx.text.paragraph import Paragraph
+from lxml import etree
+
+
+# WordprocessingML element tags
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_P = f"{{{_W_NS}}}p"
+_W_TBL = f"{{{_W_NS}}}tbl"
+_W_TR = f"{{{_W_NS}}}tr"
+_W_TC = f"{{{_W_NS}}}tc"
+_W_R = f"{{{_W_NS}}}r"
+_W_HYPERLINK = f"{{{_W_NS}}}hyperlink"
+
+# Run content rendered as text, as in python-docx Run.text
+_W_RUN_TEXT = {
+    f"{{{_W_NS}}}tab": "\t",
+    f"{{{_W_NS}}}br": "\n",
+    f"{{{_W_NS}}}cr": "\n",
+    f"{{{_W_NS}}}noBreakHyphen": "-",
+}
+_W_T = f"{{{_W_NS}}}t"
+_W_BR = f"{{{_W_NS}}}br"
+_W_TYPE = f"{{{_W_NS}}}type"
+
+# Archive folder of embedded media, and threads used to extract it
+_MEDIA_PREFIX = "word/media/"
+_MEDIA_EXTRACT_WORKERS = 4
+
+
+def _run_text(run: etree._Element, parts: List[str]) -> None:
+    """
+    Append the text of a w:r element, as in python-docx Run.text
+    
+    Only direct children are read, so drawings, text boxes and their
+    mc:AlternateContent fallbacks inside the run are skipped.
+    
+    Args:
+        run: Run element
+        parts: List to append the text pieces to
+    """
+    for element in run.iterchildren(_W_T, *_W_RUN_TEXT):
+        if element.tag == _W_T:
+            parts.append(element.text or "")
+        elif element.tag == _W_BR and element.get(_W_TYPE, "textWrapping") != "textWrapping":
+            # Page and column breaks have no text
+            continue
+        else:
+            parts.append(_W_RUN_TEXT[element.tag])
+
+
+def _paragraph_text(paragraph: etree._Element) -> str:
+    """
+    Get the text of a w:p element from its runs and hyperlink runs
+    
+    Paragraph properties such as tab stop definitions are not runs, so they
+    add no text.
+    
+    Args:
+        paragraph: Paragraph element
+    
+    Returns:
+        str: Paragraph text
+    """
+    parts = []
+    for child in paragraph.iterchildren(_W_R, _W_HYPERLINK):
+        if child.tag == _W_R:
+            _run_text(child, parts)
+        else:
+            for run in child.iterchildren(_W_R):
+                _run_text(run, parts)
+    
+    return "".join(parts)
+
+
+def _table_text(table: etree._Element) -> str:
+    """
+    Get the text of a w:tbl element, with cells separated by tabs and rows by newlines
+    
+    Args:
+        table: Table element
+        
+    Returns:
+        str: Table text
+    """
+    rows = []
+    
+    for row in table.iterchildren(_W_TR):
+        cells = []
+        for cell in row.iterchildren(_W_TC):
+            # Get text from the paragraphs of each cell
+            paragraph_texts = (_paragraph_text(p).strip() for p in cell.iterchildren(_W_P))
+            cells.append(" ".join(text for text in paragraph_texts if text))
+        
+        # Join cells with tabs
+        row_text = "\t".join(cells)
+        if row_text.strip():
+            rows.append(row_text)
+    
+    # Join rows with newlines
+    return "\n".join(rows)
+
+
+def _extract_media_entry(archive: zipfile.ZipFile, name: str, image_path: Path) -> Path:
+    """
+    Decompress one media entry of a DOCX archive to a file
+    
+    Args:
+        archive: Open DOCX archive
+        name: Archive entry name
+        image_path: Path to write the image to
+        
+    Returns:
+        Path: Path to the written image
+    """
+    with archive.open(name) as source, open(image_path, "wb") as target:
+        shutil.copyfileobj(source, target)
+    
+    return image_path
+
+
+def _block_text(element: etree._Element) -> str:
+    """
+    Get the text of a body-level paragraph or table element
+    
+    Args:
+        element: w:p or w:tbl element
+        
+    Returns:
+        str: Stripped paragraph text or table text
+    """
+    if element.tag == _W_P:
+        return _paragraph_text(element).strip()
+    
+    return _table_text(element)
 
 
 class DocxProcessor:
@@ -20,35 +152,43 @@ class DocxProcessor:
     Class for processing DOCX documents
     """
     
-    def extract_text(self, docx_path: Union[str, Path]) -> str:
+    def open_document(self, docx_path: Union[str, Path]) -> DocxDocument:
+        """
+        Open and parse a DOCX document
+        
+        The result can be passed to the extraction methods so that the file
+        is unzipped and parsed once for all of them.
+        
+        Args:
+            docx_path: Path to the DOCX file
+            
+        Returns:
+            DocxDocument: Parsed document
+        """
+        return docx.Document(str(docx_path))
+    
+    def extract_text(self, docx_path: Union[str, Path], doc: Optional[DocxDocument] = None) -> str:
         """
         Extract text from a DOCX document
         
         Args:
             docx_path: Path to the DOCX file
+            doc: Already opened document, to avoid parsing the file again
             
         Returns:
             str: Extracted text
         """
         try:
-            # Open the document
-            doc = docx.Document(str(docx_path))
+            # Open the document unless it was passed in
+            if doc is None:
+                doc = self.open_document(docx_path)
             
-            # Extract text from paragraphs
+            # Process all body elements (paragraphs and tables) of the parsed document
             full_text = []
-            
-            # Process all elements (paragraphs and tables)
-            for element in self._iter_block_items(doc):
-                if isinstance(element, Paragraph):
-                    # Extract text from paragraph
-                    text = element.text.strip()
-                    if text:
-                        full_text.append(text)
-                elif isinstance(element, Table):
-                    # Extract text from table
-                    table_text = self._extract_table_text(element)
-                    if table_text:
-                        full_text.append(table_text)
+            for element in doc.element.body.iterchildren(_W_P, _W_TBL):
+                text = _block_text(element)
+                if text:
+                    full_text.append(text)
             
             # Join all text with double newlines
             return "\n\n".join(full_text)
@@ -57,66 +197,21 @@ class DocxProcessor:
             logger.error(f"Error extracting text from DOCX: {str(e)}")
             raise
     
-    def _iter_block_items(self, doc: DocxDocument):
-        """
-        Iterate through all block items in the document (paragraphs and tables)
-        
-        Args:
-            doc: DOCX document
-            
-        Yields:
-            Union[Paragraph, Table]: Paragraph or Table object
-        """
-        # Get the document element
-        body = doc._body._body
-        
-        # Iterate through all elements
-        for child in body.iterchildren():
-            if isinstance(child, CT_P):
-                yield Paragraph(child, doc._body)
-            elif isinstance(child, CT_Tbl):
-                yield Table(child, doc._body)
-    
-    def _extract_table_text(self, table: Table) -> str:
-        """
-        Extract text from a table
-        
-        Args:
-            table: Table object
-            
-        Returns:
-            str: Extracted text from the table
-        """
-        rows = []
-        
-        for row in table.rows:
-            cells = []
-            for cell in row.cells:
-                # Get text from each cell
-                cell_text = " ".join(p.text.strip() for p in cell.paragraphs if p.text.strip())
-                cells.append(cell_text)
-            
-            # Join cells with tabs
-            row_text = "\t".join(cells)
-            if row_text.strip():
-                rows.append(row_text)
-        
-        # Join rows with newlines
-        return "\n".join(rows)
-    
-    def extract_metadata(self, docx_path: Union[str, Path]) -> Dict[str, str]:
+    def extract_metadata(self, docx_path: Union[str, Path], doc: Optional[DocxDocument] = None) -> Dict[str, str]:
         """
         Extract metadata from a DOCX document
         
         Args:
             docx_path: Path to the DOCX file
+            doc: Already opened document, to avoid parsing the file again
             
         Returns:
             Dict[str, str]: Document metadata
         """
         try:
-            # Open the document
-            doc = docx.Document(str(docx_path))
+            # Open the document unless it was passed in
+            if doc is None:
+                doc = self.open_document(docx_path)
             
             # Extract core properties
             core_props = doc.core_properties
@@ -141,13 +236,22 @@ class DocxProcessor:
             logger.error(f"Error extracting metadata from DOCX: {str(e)}")
             return {}
     
-    def extract_images(self, docx_path: Union[str, Path], output_dir: Path) -> List[Path]:
+    def extract_images(
+        self,
+        docx_path: Union[str, Path],
+        output_dir: Path,
+        doc: Optional[DocxDocument] = None,
+    ) -> List[Path]:
         """
         Extract images from a DOCX document
         
+        The media files are streamed straight from the archive, several at a
+        time, without going through the python-docx package parts.
+        
         Args:
             docx_path: Path to the DOCX file
             output_dir: Directory to save the images
+            doc: Unused, accepted like the other extraction methods
             
         Returns:
             List[Path]: List of paths to the extracted images
@@ -156,70 +260,65 @@ class DocxProcessor:
             # Create output directory if it doesn't exist
             os.makedirs(output_dir, exist_ok=True)
             
-            # Open the document
-            doc = docx.Document(str(docx_path))
+            output_dir = Path(output_dir)
             
-            image_paths = []
-            image_count = 0
-            
-            # Extract images from the document
-            for rel in doc.part.rels.values():
-                if "image" in rel.target_ref:
-                    # Get image data
-                    image_data = rel.target_part.blob
-                    
-                    # Determine image extension
-                    image_ext = rel.target_ref.split(".")[-1]
-                    
-                    # Save image
-                    image_path = output_dir / f"image_{image_count + 1}.{image_ext}"
-                    with open(image_path, "wb") as img_file:
-                        img_file.write(image_data)
-                    
-                    image_paths.append(image_path)
-                    image_count += 1
+            with zipfile.ZipFile(str(docx_path)) as archive:
+                # List the media entries once, keeping their original extensions
+                media = [
+                    name for name in archive.namelist()
+                    if name.startswith(_MEDIA_PREFIX) and not name.endswith("/")
+                ]
+                targets = [
+                    output_dir / f"image_{index}{Path(name).suffix}"
+                    for index, name in enumerate(media, start=1)
+                ]
+                
+                # Decompress the entries in parallel; zlib releases the GIL
+                with ThreadPoolExecutor(max_workers=_MEDIA_EXTRACT_WORKERS) as executor:
+                    image_paths = list(executor.map(
+                        lambda entry: _extract_media_entry(archive, *entry),
+                        zip(media, targets),
+                    ))
             
-            logger.info(f"Extracted {image_count} images from DOCX")
+            logger.info(f"Extracted {len(image_paths)} images from DOCX")
             return image_paths
             
         except Exception as e:
             logger.error(f"Error extracting images from DOCX: {str(e)}")
             return []
     
-    def extract_headers_footers(self, docx_path: Union[str, Path]) -> Dict[str, str]:
+    def extract_headers_footers(self, docx_path: Union[str, Path], doc: Optional[DocxDocument] = None) -> Dict[str, str]:
         """
         Extract headers and footers from a DOCX document
         
         Args:
             docx_path: Path to the DOCX file
+            doc: Already opened document, to avoid parsing the file again
             
         Returns:
             Dict[str, str]: Headers and footers
         """
         try:
-            # Open the document
-            doc = docx.Document(str(docx_path))
+            # Open the document unless it was passed in
+            if doc is None:
+                doc = self.open_document(docx_path)
             
             headers = []
             footers = []
             
-            # Extract headers
+            # Extract headers and footers; each is checked for linkage on its own
             for section in doc.sections:
                 # Get header text
-                if section.header.is_linked_to_previous:
-                    continue
-                
-                header_text = "\n".join(p.text for p in section.header.paragraphs if p.text.strip())
-                if header_text:
-                    headers.append(header_text)
+                if not section.header.is_linked_to_previous:
+                    header_text = self._join_paragraph_texts(section.header.paragraphs)
+                    if header_text:
+                        headers.append(header_text)
                 
                 # Get footer text
-                if section.footer.is_linked_to_previous:
-                    continue
-                
-                footer_text = "\n".join(p.text for p in section.footer.paragraphs if p.text.strip())
-                if footer_text:
-                    footers.append(footer_text)
+                if not section.footer.is_linked_to_previous:
+                    footer_text = self._join_paragraph_texts(section.footer.paragraphs)
+                    if footer_text:
+                        footers.append(footer_text)
             
             return {
                 "headers": "\n".join(headers),
@@ -230,19 +329,36 @@ class DocxProcessor:
             logger.error(f"Error extracting headers and footers from DOCX: {str(e)}")
             return {"headers": "", "footers": ""}
     
-    def extract_structure(self, docx_path: Union[str, Path]) -> List[Dict]:
+    def _join_paragraph_texts(self, paragraphs: list) -> str:
+        """
+        Join the non-blank texts of paragraphs with newlines
+        
+        Each paragraph's text is built from the XML once.
+        
+        Args:
+            paragraphs: python-docx paragraphs
+            
+        Returns:
+            str: Joined paragraph texts
+        """
+        texts = (p.text for p in paragraphs)
+        return "\n".join(text for text in texts if text.strip())
+    
+    def extract_structure(self, docx_path: Union[str, Path], doc: Optional[DocxDocument] = None) -> List[Dict]:
         """
         Extract document structure (headings and their levels)
         
         Args:
             docx_path: Path to the DOCX file
+            doc: Already opened document, to avoid parsing the file again
             
         Returns:
             List[Dict]: Document structure
         """
         try:
-            # Open the document
-            doc = docx.Document(str(docx_path))
+            # Open the document unless it was passed in
+            if doc is None:
+                doc = self.open_document(docx_path)
             
             structure = []
             
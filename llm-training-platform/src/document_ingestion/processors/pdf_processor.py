@@ -5,30 +5,149 @@ PDF Processor module for handling PDF documents
 import os
 import fitz  # PyMuPDF
 import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 from pdf2image import convert_from_path
 from loguru import logger
 
+from src.common.config.settings import settings
+
+
+# Do not print MuPDF warnings for every damaged object; they are still
+# available through fitz.TOOLS.mupdf_warnings()
+fitz.TOOLS.mupdf_display_errors(False)
+
+# Plain text extraction flags: expand ligatures into their letters, which is
+# what downstream text processing expects, and clip to the page mediabox
+_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+# Minimum page count for extracting text in parallel; smaller documents
+# are faster to extract than to hand to worker processes
+_PARALLEL_MIN_PAGES = 32
+
+# Shared process pool for parallel text extraction, started on first use
+_text_pool: Optional[ProcessPoolExecutor] = None
+_text_pool_lock = threading.Lock()
+
+# Whether extract_text may hand pages to the shared pool; turned off in
+# worker processes of other pools so pools are not nested
+_parallel_extraction = True
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of a range of pages in a worker process
+    
+    PyMuPDF documents cannot be shared between threads, so each worker opens
+    its own copy. Defined at module level so it can be pickled by the process pool.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        start: First page number
+        stop: Page number after the last page
+        
+    Returns:
+        List[str]: Text of each page
+    """
+    with fitz.open(pdf_path) as pdf_document:
+        return [
+            pdf_document[page_num].get_text("text", flags=_TEXT_FLAGS, sort=False)
+            for page_num in range(start, stop)
+        ]
+
+
+def _text_pool_size() -> int:
+    """
+    Get the number of text extraction worker processes
+    
+    Returns:
+        int: This server process's share of the CPUs
+    """
+    return max(1, (os.cpu_count() or 1) // settings.api.server_processes)
+
+
+def _get_text_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool used for parallel text extraction, starting it if needed
+    
+    The pool is shared by all documents and requests of this process and splits
+    the CPUs with the other server processes. Workers are spawned rather than
+    forked, since the server process already runs other threads.
+    
+    Returns:
+        ProcessPoolExecutor: Text extraction process pool
+    """
+    global _text_pool
+    
+    with _text_pool_lock:
+        if _text_pool is None:
+            max_workers = _text_pool_size()
+            _text_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Started PDF text extraction process pool with {max_workers} workers.")
+        
+        return _text_pool
+
+
+def shutdown_text_pool():
+    """Shut down the PDF text extraction process pool."""
+    global _text_pool
+    
+    with _text_pool_lock:
+        if _text_pool is not None:
+            _text_pool.shutdown(wait=True)
+            _text_pool = None
+            logger.info("Stopped PDF text extraction process pool.")
+
+
+def disable_parallel_extraction():
+    """Extract text in the calling process only, e.g. in a worker process of another pool."""
+    global _parallel_extraction
+    
+    _parallel_extraction = False
+
 
 class PDFProcessor:
     """
     Class for processing PDF documents
     """
     
-    def is_searchable(self, pdf_path: Path) -> bool:
+    def open_document(self, pdf_path: Path) -> "fitz.Document":
+        """
+        Open a PDF document
+        
+        The result can be passed to the other methods so that the file is
+        opened and its cross-reference table parsed once for all of them.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            fitz.Document: Opened document, usable as a context manager
+        """
+        return fitz.open(str(pdf_path))
+    
+    def is_searchable(self, pdf_path: Path, pdf_document: Optional["fitz.Document"] = None) -> bool:
         """
         Check if a PDF is searchable (contains text) or is a scanned image
         
         Args:
             pdf_path: Path to the PDF file
+            pdf_document: Already opened document, to avoid opening the file again
             
         Returns:
             bool: True if the PDF is searchable, False if it's a scanned image
         """
         try:
-            # Open the PDF
-            pdf_document = fitz.open(str(pdf_path))
+            # Open the PDF unless it was passed in
+            owns_document = pdf_document is None
+            if owns_document:
+                pdf_document = self.open_document(pdf_path)
             
             # Check if the PDF has text
             has_text = False
@@ -36,14 +155,22 @@ class PDFProcessor:
             # Check first few pages (up to 5) for text
             for page_num in range(min(5, pdf_document.page_count)):
                 page = pdf_document[page_num]
-                text = page.get_text()
+                
+                # Pages without text objects in their content stream or form XObjects
+                # (get_xobjects, whose own streams can draw text) have no text, so skip
+                # the text extraction for them, e.g. scans
+                if b"BT" not in page.read_contents() and not page.get_xobjects():
+                    continue
+                
+                text = page.get_text("text", flags=_TEXT_FLAGS, sort=False)
                 
                 # If we find a reasonable amount of text, consider it searchable
                 if len(text.strip()) > 50:  # Arbitrary threshold
                     has_text = True
                     break
             
-            pdf_document.close()
+            if owns_document:
+                pdf_document.close()
             return has_text
             
         except Exception as e:
@@ -51,29 +178,50 @@ class PDFProcessor:
             # Default to assuming it's not searchable if there's an error
             return False
     
-    def extract_text(self, pdf_path: Path) -> str:
+    def extract_text(self, pdf_path: Path, pdf_document: Optional["fitz.Document"] = None) -> str:
         """
         Extract text from a searchable PDF
         
         Args:
             pdf_path: Path to the PDF file
+            pdf_document: Already opened document, to avoid opening the file again
             
         Returns:
             str: Extracted text
         """
         try:
-            # Open the PDF
-            pdf_document = fitz.open(str(pdf_path))
+            # Open the PDF unless it was passed in
+            owns_document = pdf_document is None
+            if owns_document:
+                pdf_document = self.open_document(pdf_path)
+            page_count = pdf_document.page_count
             
-            # Extract text from all pages
-            text = ""
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                text += page.get_text()
-                text += "\n\n"  # Add separation between pages
+            workers = min(_text_pool_size(), page_count // _PARALLEL_MIN_PAGES) if _parallel_extraction else 1
+            
+            if workers > 1:
+                if owns_document:
+                    pdf_document.close()
+                
+                # Split the pages into one contiguous range per worker process
+                bounds = [page_count * i // workers for i in range(workers + 1)]
+                ranges = _get_text_pool().map(
+                    _extract_page_range,
+                    [str(pdf_path)] * workers,
+                    bounds[:-1],
+                    bounds[1:],
+                )
+                pages = [page_text for page_range in ranges for page_text in page_range]
+            else:
+                pages = [
+                    pdf_document[page_num].get_text("text", flags=_TEXT_FLAGS, sort=False)
+                    for page_num in range(page_count)
+                ]
+                if owns_document:
+                    pdf_document.close()
             
-            pdf_document.close()
-            return text
+            # Join once instead of growing a string page by page,
+            # keeping the separation after every page
+            return "".join(f"{page_text}\n\n" for page_text in pages)
             
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
@@ -91,68 +239,79 @@ class PDFProcessor:
             List[Path]: List of paths to the generated images
         """
         try:
-            # Convert PDF to images
-            images = convert_from_path(
+            # Convert PDF to images; pdf2image splits the pages into one range per
+            # pdftoppm process. Only the paths are returned, so the rendered pages
+            # are not all loaded into memory at once.
+            image_paths = convert_from_path(
                 str(pdf_path),
                 dpi=300,  # Higher DPI for better OCR results
                 output_folder=str(output_dir),
+                output_file="page",
                 fmt="png",
-                thread_count=os.cpu_count() or 1
+                thread_count=os.cpu_count() or 1,
+                paths_only=True,
             )
             
-            # Get paths to the generated images
-            image_paths = []
-            for i, _ in enumerate(images):
-                image_path = output_dir / f"page_{i+1}.png"
-                image_paths.append(image_path)
-            
-            return image_paths
+            # Paths of the generated images, in page order
+            return [Path(image_path) for image_path in image_paths]
             
         except Exception as e:
             logger.error(f"Error converting PDF to images: {str(e)}")
             raise
     
-    def get_metadata(self, pdf_path: Path) -> dict:
+    def get_metadata(self, pdf_path: Path, pdf_document: Optional["fitz.Document"] = None) -> dict:
         """
         Extract metadata from a PDF
         
         Args:
             pdf_path: Path to the PDF file
+            pdf_document: Already opened document, to avoid opening the file again
             
         Returns:
             dict: PDF metadata
         """
         try:
-            # Open the PDF
-            pdf_document = fitz.open(str(pdf_path))
+            # Open the PDF unless it was passed in
+            owns_document = pdf_document is None
+            if owns_document:
+                pdf_document = self.open_document(pdf_path)
             
             # Extract metadata
-            metadata = pdf_document.metadata
+            metadata = dict(pdf_document.metadata or {})
             
             # Add page count
             metadata["page_count"] = pdf_document.page_count
             
-            pdf_document.close()
+            if owns_document:
+                pdf_document.close()
             return metadata
             
         except Exception as e:
             logger.error(f"Error extracting metadata from PDF: {str(e)}")
             return {}
     
-    def extract_images(self, pdf_path: Path, output_dir: Path) -> List[Path]:
+    def extract_images(
+        self,
+        pdf_path: Path,
+        output_dir: Path,
+        pdf_document: Optional["fitz.Document"] = None,
+    ) -> List[Path]:
         """
         Extract embedded images from a PDF
         
         Args:
             pdf_path: Path to the PDF file
             output_dir: Directory to save the images
+            pdf_document: Already opened document, to avoid opening the file again
             
         Returns:
             List[Path]: List of paths to the extracted images
         """
         try:
-            # Open the PDF
-            pdf_document = fitz.open(str(pdf_path))
+            # Open the PDF unless it was passed in
+            owns_document = pdf_document is None
+            if owns_document:
+                pdf_document = self.open_document(pdf_path)
             
             image_paths = []
             image_count = 0
@@ -181,7 +340,8 @@ class PDFProcessor:
                     image_paths.append(image_path)
                     image_count += 1
             
-            pdf_document.close()
+            if owns_document:
+                pdf_document.close()
             logger.info(f"Extracted {image_count} images from PDF")
             return image_paths
             
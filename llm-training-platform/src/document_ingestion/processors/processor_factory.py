@@ -2,72 +2,221 @@
 Document processor factory for selecting the appropriate processor based on file type
 """
 
+import os
+import json
+import hashlib
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, List
 from loguru import logger
 
-from src.document_ingestion.utils.file_utils import get_file_type
-from src.document_ingestion.processors.pdf_processor import PDFProcessor
+from src.common.config.settings import settings
+from src.document_ingestion.utils.file_utils import get_file_type, prune_cache_dir
+from src.document_ingestion.processors.pdf_processor import PDFProcessor, disable_parallel_extraction
 from src.document_ingestion.processors.docx_processor import DocxProcessor
 from src.document_ingestion.processors.txt_processor import TxtProcessor
 
 
+# Shared processor instances by file type; the processors keep no per-document state
+_PROCESSORS = {
+    "pdf": PDFProcessor(),
+    "docx": DocxProcessor(),
+    "txt": TxtProcessor(),
+}
+
+# The processing cache is pruned to its size budget every this many writes per process
+_CACHE_PRUNE_INTERVAL = 100
+_cache_writes = itertools.count()
+
+# Result fields holding lists of file paths, which the cache stores as strings
+_PATH_LIST_KEYS = ("images", "extracted_images")
+
 class ProcessorFactory:
     """
     Factory class for creating document processors based on file type
     """
     
     @staticmethod
-    def get_processor(file_path: Union[str, Path]):
+    def get_processor(file_path: Union[str, Path], file_type: Optional[str] = None):
         """
         Get the appropriate processor for a file based on its type
         
         Args:
             file_path: Path to the file
+            file_type: Already detected file type, to avoid sniffing the file again
             
         Returns:
-            Document processor instance
+            Shared document processor instance
             
         Raises:
             ValueError: If the file type is not supported
         """
         try:
-            # Get the file type
-            file_type = get_file_type(Path(file_path))
-            
-            # Create the appropriate processor
-            if file_type == "pdf":
-                logger.info(f"Creating PDF processor for {file_path}")
-                return PDFProcessor()
-            elif file_type == "docx":
-                logger.info(f"Creating DOCX processor for {file_path}")
-                return DocxProcessor()
-            elif file_type == "txt":
-                logger.info(f"Creating TXT processor for {file_path}")
-                return TxtProcessor()
-            else:
+            # Get the file type unless it was passed in
+            if file_type is None:
+                file_type = get_file_type(Path(file_path))
+            
+            # Look up the shared processor for the type
+            processor = _PROCESSORS.get(file_type)
+            if processor is None:
                 logger.error(f"Unsupported file type: {file_type}")
                 raise ValueError(f"Unsupported file type: {file_type}")
+            
+            return processor
                 
         except Exception as e:
             logger.error(f"Error creating processor: {str(e)}")
             raise
 
 
+def _process_document_worker(file_path: Union[str, Path], output_dir: Optional[Path]) -> dict:
+    """
+    Process a document in a worker process
+    
+    Defined at module level so it can be pickled by the process pool.
+    
+    Args:
+        file_path: Path to the document
+        output_dir: Directory to save processed files (optional)
+        
+    Returns:
+        dict: Processing results
+    """
+    return DocumentProcessor().process_document(file_path, output_dir)
+
+
 class DocumentProcessor:
     """
     Main document processor that delegates to specific processors
     """
     
-    def __init__(self):
+    def process_document(
+        self,
+        file_path: Union[str, Path],
+        output_dir: Optional[Path] = None,
+        use_cache: bool = True,
+    ) -> dict:
         """
-        Initialize the document processor
+        Process a document
+        
+        Successful results are cached by the file's path, modification time and
+        size, so re-ingesting an unchanged file skips parsing it again. The cache
+        is off when encryption at rest is enabled, since entries hold the
+        extracted text in plain form.
+        
+        Args:
+            file_path: Path to the document
+            output_dir: Directory to save processed files (optional)
+            use_cache: Look up and store the result in the processing cache
+            
+        Returns:
+            dict: Processing results
         """
-        self.factory = ProcessorFactory()
+        use_cache = use_cache and not settings.security.encryption_master_key
+        cache_path = self._cache_path(file_path, output_dir) if use_cache else None
+        
+        if cache_path is not None:
+            cached = self._load_cached_result(cache_path)
+            if cached is not None:
+                logger.info(f"Using cached processing result for {file_path}")
+                return cached
+        
+        result = self._process_document(file_path, output_dir)
+        
+        if cache_path is not None and result.get("success"):
+            self._store_cached_result(cache_path, result)
+        
+        return result
     
-    def process_document(self, file_path: Union[str, Path], output_dir: Optional[Path] = None) -> dict:
+    def _cache_path(self, file_path: Union[str, Path], output_dir: Optional[Path]) -> Optional[Path]:
         """
-        Process a document
+        Get the processing cache file of a document
+        
+        Args:
+            file_path: Path to the document
+            output_dir: Directory to save processed files
+            
+        Returns:
+            Optional[Path]: Cache file path, or None if the file cannot be read
+        """
+        try:
+            stats = os.stat(file_path)
+        except OSError:
+            return None
+        
+        # The output directory is part of the key, since results refer to files in it
+        key = f"{Path(file_path).resolve()}:{stats.st_mtime_ns}:{stats.st_size}:{output_dir}"
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        
+        return Path(settings.storage.processing_cache_dir) / digest[:2] / f"{digest}.json"
+    
+    def _load_cached_result(self, cache_path: Path) -> Optional[dict]:
+        """
+        Load a cached processing result
+        
+        Path fields are converted back to Path objects, so a cached result has
+        the same types as a fresh one.
+        
+        Args:
+            cache_path: Cache file path
+            
+        Returns:
+            Optional[dict]: Cached result, or None on a miss or if files it refers to are gone
+        """
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Error reading processing cache entry: {str(e)}")
+            return None
+        
+        for key in _PATH_LIST_KEYS:
+            if key in result:
+                result[key] = [Path(path) for path in result[key]]
+                
+                # Treat the entry as stale if rendered or extracted images were removed
+                if not all(path.exists() for path in result[key]):
+                    return None
+        
+        # Mark the entry as recently used for pruning
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        
+        return result
+    
+    def _store_cached_result(self, cache_path: Path, result: dict) -> None:
+        """
+        Store a processing result in the cache
+        
+        Args:
+            cache_path: Cache file path
+            result: Processing result
+        """
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Write to a temporary file and rename, so readers never see partial entries
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # Paths are stored as strings
+                json.dump(result, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, cache_path)
+            
+            if next(_cache_writes) % _CACHE_PRUNE_INTERVAL == 0:
+                prune_cache_dir(Path(settings.storage.processing_cache_dir), settings.storage.processing_cache_max_bytes)
+        except Exception as e:
+            logger.warning(f"Error writing processing cache entry: {str(e)}")
+    
+    def _process_document(self, file_path: Union[str, Path], output_dir: Optional[Path]) -> dict:
+        """
+        Process a document without the cache
         
         Args:
             file_path: Path to the document
@@ -84,11 +233,9 @@ class DocumentProcessor:
             if output_dir:
                 output_dir.mkdir(parents=True, exist_ok=True)
             
-            # Get the appropriate processor
-            processor = self.factory.get_processor(file_path)
-            
-            # Process based on file type
+            # Detect the file type once and get the appropriate processor
             file_type = get_file_type(file_path)
+            processor = ProcessorFactory.get_processor(file_path, file_type=file_type)
             
             result = {
                 "file_path": str(file_path),
@@ -102,52 +249,57 @@ class DocumentProcessor:
             # Extract text
             try:
                 if file_type == "pdf":
-                    # Check if PDF is searchable
-                    is_searchable = processor.is_searchable(file_path)
-                    result["is_searchable"] = is_searchable
-                    
-                    # Extract text
-                    if is_searchable:
-                        result["text"] = processor.extract_text(file_path)
-                    else:
-                        # For non-searchable PDFs, convert to images and use OCR
-                        # This would be handled by the OCR module
-                        result["requires_ocr"] = True
+                    # Open the PDF once for all steps
+                    with processor.open_document(file_path) as pdf_document:
+                        # Check if PDF is searchable
+                        is_searchable = processor.is_searchable(file_path, pdf_document=pdf_document)
+                        result["is_searchable"] = is_searchable
+                        
+                        # Extract text
+                        if is_searchable:
+                            result["text"] = processor.extract_text(file_path, pdf_document=pdf_document)
+                        else:
+                            # For non-searchable PDFs, convert to images and use OCR
+                            # This would be handled by the OCR module
+                            result["requires_ocr"] = True
+                            
+                            # If output directory is provided, convert to images
+                            if output_dir:
+                                result["images"] = processor.convert_to_images(file_path, output_dir)
                         
-                        # If output directory is provided, convert to images
+                        # Get metadata
+                        result["metadata"] = processor.get_metadata(file_path, pdf_document=pdf_document)
+                        
+                        # Extract images if output directory is provided
                         if output_dir:
-                            result["images"] = processor.convert_to_images(file_path, output_dir)
-                    
-                    # Get metadata
-                    result["metadata"] = processor.get_metadata(file_path)
-                    
-                    # Extract images if output directory is provided
-                    if output_dir:
-                        result["extracted_images"] = processor.extract_images(file_path, output_dir)
-                    
+                            result["extracted_images"] = processor.extract_images(file_path, output_dir, pdf_document=pdf_document)
+                        
                 elif file_type == "docx":
+                    # Parse the document once for all extractions
+                    doc = processor.open_document(file_path)
+                    
                     # Extract text
-                    result["text"] = processor.extract_text(file_path)
+                    result["text"] = processor.extract_text(file_path, doc=doc)
                     
                     # Get metadata
-                    result["metadata"] = processor.extract_metadata(file_path)
+                    result["metadata"] = processor.extract_metadata(file_path, doc=doc)
                     
                     # Extract headers and footers
-                    result["headers_footers"] = processor.extract_headers_footers(file_path)
+                    result["headers_footers"] = processor.extract_headers_footers(file_path, doc=doc)
                     
                     # Extract document structure
-                    result["structure"] = processor.extract_structure(file_path)
+                    result["structure"] = processor.extract_structure(file_path, doc=doc)
                     
                     # Extract images if output directory is provided
                     if output_dir:
-                        result["extracted_images"] = processor.extract_images(file_path, output_dir)
+                        result["extracted_images"] = processor.extract_images(file_path, output_dir, doc=doc)
                     
                 elif file_type == "txt":
                     # Extract text
                     result["text"] = processor.extract_text(file_path)
                     
-                    # Get metadata
-                    result["metadata"] = processor.get_metadata(file_path)
+                    # Get metadata from the extracted text
+                    result["metadata"] = processor.get_metadata(file_path, text=result["text"])
                     
                     # Extract sections
                     result["sections"] = processor.extract_sections(result["text"])
@@ -168,3 +320,38 @@ class DocumentProcessor:
                 "success": False,
                 "error": str(e)
             }
+    
+    def process_documents(
+        self,
+        file_paths: List[Union[str, Path]],
+        output_dirs: Optional[List[Optional[Path]]] = None,
+        max_workers: Optional[int] = None,
+        chunksize: int = 4,
+    ) -> List[dict]:
+        """
+        Process a batch of documents in parallel worker processes
+        
+        Args:
+            file_paths: Paths to the documents
+            output_dirs: Directory to save the processed files of each document (optional)
+            max_workers: Number of worker processes, defaults to settings.storage.ingest_workers
+            chunksize: Number of documents sent to a worker at a time
+            
+        Returns:
+            List[dict]: Processing results, in the order of file_paths
+        """
+        if output_dirs is None:
+            output_dirs = [None] * len(file_paths)
+        
+        if not file_paths:
+            return []
+        
+        max_workers = min(max_workers or settings.storage.ingest_workers, len(file_paths))
+        
+        # Documents are already processed in parallel, so workers extract PDF text serially
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=disable_parallel_extraction,
+        ) as executor:
+            return list(executor.map(_process_document_worker, file_paths, output_dirs, chunksize=chunksize))
@@ -3,11 +3,62 @@ TXT Processor module for handling plain text files
 """
 
 import os
-import chardet
+import mmap
+from chardet.universaldetector import UniversalDetector
 from pathlib import Path
-from typing import Union, Optional, Dict
+from typing import Union, Optional, Dict, Tuple
 from loguru import logger
 
+from src.common.config.settings import settings
+
+# fastText language identification, falling back to langdetect when not installed
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+
+
+# Bytes fed to the encoding detector per read, and at most in total
+_DETECT_CHUNK_SIZE = 64 * 1024
+_DETECT_MAX_BYTES = 1024 * 1024
+
+# Characters of text sampled for language detection
+_LANGUAGE_SAMPLE_CHARS = 5000
+
+# fastText language identification model, loaded on first use
+_language_model = None
+_language_model_loaded = False
+
+
+def _load_language_model():
+    """
+    Load the fastText language identification model, once per process
+    
+    Returns:
+        fastText model, or None if fastText or the model file is not available
+    """
+    global _language_model, _language_model_loaded
+    
+    if _language_model_loaded:
+        return _language_model
+    
+    _language_model_loaded = True
+    
+    if fasttext is None:
+        return None
+    
+    model_path = Path(settings.model.language_id_model_path)
+    if not model_path.exists():
+        logger.warning(f"Language identification model not found at {model_path}, using langdetect")
+        return None
+    
+    try:
+        _language_model = fasttext.load_model(str(model_path))
+    except Exception as e:
+        logger.warning(f"Error loading language identification model, using langdetect: {str(e)}")
+    
+    return _language_model
+
 
 class TxtProcessor:
     """
@@ -18,6 +69,9 @@ class TxtProcessor:
         """
         Extract text from a TXT file with encoding detection
         
+        The file is memory-mapped, so encoding detection and decoding both read
+        the page cache directly instead of copying the file into Python bytes.
+        
         Args:
             txt_path: Path to the TXT file
             
@@ -25,26 +79,28 @@ class TxtProcessor:
             str: Extracted text
         """
         try:
-            # Read the file in binary mode to detect encoding
             with open(str(txt_path), 'rb') as file:
-                raw_data = file.read()
-            
-            # Detect encoding
-            result = chardet.detect(raw_data)
-            encoding = result['encoding'] or 'utf-8'
-            confidence = result['confidence']
-            
-            logger.info(f"Detected encoding: {encoding} with confidence: {confidence}")
+                # Empty files cannot be memory-mapped
+                if os.fstat(file.fileno()).st_size == 0:
+                    return ""
+                
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    # Detect encoding
+                    encoding, confidence = self._detect_encoding(data)
+                    
+                    logger.info(f"Detected encoding: {encoding} with confidence: {confidence}")
+                    
+                    # Decode the file with the detected encoding
+                    try:
+                        text = str(data, encoding)
+                    except UnicodeDecodeError:
+                        # Fall back to utf-8 if the detected encoding fails
+                        logger.warning(f"Failed to decode with {encoding}, falling back to utf-8")
+                        text = str(data, 'utf-8', 'replace')
             
-            # Read the file with the detected encoding
-            try:
-                with open(str(txt_path), 'r', encoding=encoding) as file:
-                    text = file.read()
-            except UnicodeDecodeError:
-                # Fall back to utf-8 if the detected encoding fails
-                logger.warning(f"Failed to decode with {encoding}, falling back to utf-8")
-                with open(str(txt_path), 'r', encoding='utf-8', errors='replace') as file:
-                    text = file.read()
+            # Translate newlines as reading in text mode did
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
             
             return text
             
@@ -52,6 +108,38 @@ class TxtProcessor:
             logger.error(f"Error extracting text from TXT: {str(e)}")
             raise
     
+    def _detect_encoding(self, data: mmap.mmap) -> Tuple[str, float]:
+        """
+        Detect the encoding of a file incrementally
+        
+        The detector is fed the file in chunks until it is confident, or up to
+        _DETECT_MAX_BYTES, instead of running over the whole file at once.
+        
+        Args:
+            data: Memory-mapped file contents
+            
+        Returns:
+            Tuple[str, float]: Detected encoding and confidence
+        """
+        detector = UniversalDetector()
+        
+        end = min(len(data), _DETECT_MAX_BYTES)
+        for start in range(0, end, _DETECT_CHUNK_SIZE):
+            detector.feed(data[start:min(start + _DETECT_CHUNK_SIZE, end)])
+            
+            if detector.done:
+                break
+        
+        detector.close()
+        
+        encoding = detector.result['encoding'] or 'utf-8'
+        
+        # A sample that is pure ASCII does not rule out UTF-8 later in the file
+        if encoding == 'ascii':
+            encoding = 'utf-8'
+        
+        return encoding, detector.result['confidence']
+    
     def detect_language(self, text: str) -> str:
         """
         Detect the language of the text
@@ -63,10 +151,21 @@ class TxtProcessor:
             str: Detected language code
         """
         try:
-            from langdetect import detect
-            
             # Get a sample of the text for language detection
-            sample = text[:min(5000, len(text))]
+            sample = text[:_LANGUAGE_SAMPLE_CHARS]
+            
+            # Detect language with fastText if its model is available,
+            # falling back to langdetect if it fails
+            model = _load_language_model()
+            if model is not None:
+                try:
+                    # fastText predicts one line at a time
+                    labels, _ = model.predict(sample.replace('\n', ' '), k=1)
+                    return labels[0].replace('__label__', '')
+                except Exception as e:
+                    logger.warning(f"fastText language detection failed, using langdetect: {str(e)}")
+            
+            from langdetect import detect
             
             # Detect language
             lang = detect(sample)
@@ -77,12 +176,13 @@ class TxtProcessor:
             logger.error(f"Language detection error: {str(e)}")
             return "unknown"
     
-    def get_metadata(self, txt_path: Union[str, Path]) -> Dict[str, str]:
+    def get_metadata(self, txt_path: Union[str, Path], text: Optional[str] = None) -> Dict[str, str]:
         """
         Get metadata for a TXT file
         
         Args:
             txt_path: Path to the TXT file
+            text: Already extracted text of the file, to avoid reading and decoding it again
             
         Returns:
             Dict[str, str]: File metadata
@@ -91,8 +191,9 @@ class TxtProcessor:
             # Get file stats
             stats = os.stat(str(txt_path))
             
-            # Extract text for language detection
-            text = self.extract_text(txt_path)
+            # Extract text for language detection unless it was passed in
+            if text is None:
+                text = self.extract_text(txt_path)
             
             # Detect language
             language = self.detect_language(text)
@@ -5,11 +5,11 @@ Document ingestion service for handling document uploads and processing
 import os
 import uuid
 import shutil
+from itertools import repeat
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Union
 from loguru import logger
-import cv2
 
 from sqlalchemy.orm import Session
 
@@ -18,8 +18,7 @@ from src.common.models.document import Document, DocumentStatus
 from src.document_ingestion.utils.file_utils import create_directory_if_not_exists, is_valid_file_type
 from src.document_ingestion.utils.file_encryption import encrypt_document, decrypt_document
 from src.document_ingestion.processors.processor_factory import DocumentProcessor
-from src.document_ingestion.ocr.ocr_engine import OCREngine
-from src.document_ingestion.preprocessing.image_preprocessor import ImagePreprocessor
+from src.document_ingestion.ocr.ocr_worker import init_ocr_pool, ocr_page
 from src.document_ingestion.preprocessing.text_preprocessor import TextPreprocessor
 
 
@@ -37,8 +36,6 @@ class IngestionService:
         """
         self.db = db
         self.document_processor = DocumentProcessor()
-        self.ocr_engine = OCREngine()
-        self.image_preprocessor = ImagePreprocessor()
         self.text_preprocessor = TextPreprocessor()
         
         # Create necessary directories
@@ -270,28 +267,11 @@ class IngestionService:
                 logger.warning(f"No images found for OCR processing: {document.id}")
                 return ocr_result
             
-            # Create OCR output directory
-            ocr_dir = output_dir / "ocr"
-            create_directory_if_not_exists(ocr_dir)
+            logger.info(f"Processing OCR for {len(images)} images")
             
-            # Process each image
-            all_text = []
-            
-            for i, image_path in enumerate(images):
-                logger.info(f"Processing OCR for image {i+1}/{len(images)}: {image_path}")
-                
-                # Preprocess the image
-                enhanced_image = self.image_preprocessor.preprocess(image_path)
-                
-                # Save enhanced image
-                enhanced_path = ocr_dir / f"enhanced_{i+1}.png"
-                cv2.imwrite(str(enhanced_path), enhanced_image)
-                
-                # Perform OCR
-                text = self.ocr_engine.process_image(enhanced_path, language=document.language)
-                
-                # Add to results
-                all_text.append(text)
+            # Preprocess and OCR the pages in the OCR process pool, keeping page order
+            pool = init_ocr_pool()
+            all_text = list(pool.map(ocr_page, images, repeat(document.language)))
             
             # Combine all text
             combined_text = "\n\n".join(all_text)
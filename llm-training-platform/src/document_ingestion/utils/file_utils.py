@@ -3,6 +3,8 @@ File utility functions for document ingestion service
 """
 
 import os
+import io
+import shutil
 import mimetypes
 import magic
 from pathlib import Path
@@ -117,3 +119,104 @@ def get_file_extension(filename: str) -> str:
         str: File extension
     """
     return os.path.splitext(filename)[1].lower()
+
+
+def get_file_object_size(file_obj) -> int:
+    """
+    Get the size of an open binary file object without reading it
+    
+    Args:
+        file_obj: Seekable file object
+        
+    Returns:
+        int: File size in bytes
+    """
+    size = file_obj.seek(0, os.SEEK_END)
+    file_obj.seek(0)
+    return size
+
+
+def copy_file_object(src, dst, size: int, chunk_size: int = 1 << 20) -> None:
+    """
+    Copy an open file object to another, in the kernel where possible
+    
+    Uses os.sendfile between the file descriptors of files on disk, so the
+    data never passes through Python buffers. Spooled uploads still held in
+    memory are copied with a buffered copy, since asking them for a file
+    descriptor would first write them to a temporary file. Also falls back
+    to the buffered copy when either side has no file descriptor or
+    sendfile is not supported.
+    
+    Args:
+        src: Source binary file object, positioned at the start
+        dst: Destination binary file object opened for writing
+        size: Number of bytes to copy
+        chunk_size: Maximum number of bytes per copy call
+    """
+    # fileno() rolls an in-memory SpooledTemporaryFile over to disk
+    if getattr(src, "_rolled", True):
+        try:
+            src_fd = src.fileno()
+            dst_fd = dst.fileno()
+            dst.flush()
+            
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst_fd, src_fd, offset, min(chunk_size, size - offset))
+                if not sent:
+                    break
+                offset += sent
+            
+            return
+        except (AttributeError, OSError, io.UnsupportedOperation) as e:
+            logger.debug(f"sendfile not available, using buffered copy: {str(e)}")
+        
+        # Restart from the beginning with a buffered copy
+        src.seek(0)
+        dst.seek(0)
+        dst.truncate()
+    
+    shutil.copyfileobj(src, dst, chunk_size)
+
+
+def prune_cache_dir(cache_dir: Path, max_bytes: int) -> None:
+    """
+    Delete the least recently used files of a cache directory over a size budget
+    
+    Files are ordered by modification time, so cache readers should touch
+    entries on a hit. Errors are ignored, since other processes may prune
+    the same directory concurrently.
+    
+    Args:
+        cache_dir: Cache directory
+        max_bytes: Maximum total size of the files in the directory tree
+    """
+    entries = []
+    total = 0
+    
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stats = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stats.st_mtime, stats.st_size, path))
+            total += stats.st_size
+    
+    if total <= max_bytes:
+        return
+    
+    # Delete the least recently used entries first until the cache fits
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        
+        total -= size
+        if total <= max_bytes:
+            break
+    
+    logger.info(f"Pruned cache directory {cache_dir} to {total} bytes")
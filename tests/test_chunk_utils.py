@@ -0,0 +1,46 @@
+import importlib
+import sys
+
+import pytest
+
+sys.path.insert(0, "llm-training-platform")
+
+chunk_utils = importlib.import_module("src.data_structuring.chunking.chunk_utils")
+
+
+def _chunk_rows(texts):
+    return [{"text": text, "position": i} for i, text in enumerate(texts)]
+
+
+def test_unchanged_chunks_are_kept():
+    existing = {0: "a", 1: "b", 2: "c"}
+    assert chunk_utils.stale_chunk_positions(existing, _chunk_rows(["a", "b", "c"])) == []
+
+
+def test_changed_text_and_removed_tail_are_stale():
+    existing = {3: "d", 0: "a", 1: "b", 2: "c"}
+    assert chunk_utils.stale_chunk_positions(existing, _chunk_rows(["a", "B"])) == [1, 2, 3]
+
+
+def test_new_positions_are_not_stale():
+    existing = {0: "a"}
+    assert chunk_utils.stale_chunk_positions(existing, _chunk_rows(["a", "b", "c"])) == []
+
+
+def test_nothing_stored_has_no_stale_positions():
+    assert chunk_utils.stale_chunk_positions({}, _chunk_rows(["a"])) == []
+
+
+def test_rechunking_an_edited_document():
+    chunking_service = pytest.importorskip("src.data_structuring.chunking.chunking_service")
+    schemas = pytest.importorskip("src.data_structuring.api.schemas")
+    service = chunking_service.ChunkingService()
+
+    paragraphs = [f"Paragraph {i} says something about topic {i}." for i in range(6)]
+    before = service.chunk_text("\n\n".join(paragraphs), 100, 0, schemas.ChunkStrategy.PARAGRAPH)
+    paragraphs[3] = "Paragraph 3 was rewritten."
+    after = service.chunk_text("\n\n".join(paragraphs[:5]), 100, 0, schemas.ChunkStrategy.PARAGRAPH)
+
+    # The first chunk is unchanged, the second has the edit and the third lost a paragraph
+    assert len(before) == len(after) == 3
+    assert chunk_utils.stale_chunk_positions(dict(enumerate(before)), _chunk_rows(after)) == [1, 2]
@@ -0,0 +1,106 @@
+import sys
+
+import pytest
+
+sys.path.insert(0, "llm-training-platform")
+
+chunking_service = pytest.importorskip("src.data_structuring.chunking.chunking_service")
+schemas = pytest.importorskip("src.data_structuring.api.schemas")
+
+ChunkStrategy = schemas.ChunkStrategy
+
+SENTENCES = (
+    "The quick brown fox jumps over the lazy dog. It was not amused! "
+    "Why would it be? The fox ran off into the woods.\nNobody saw it again."
+)
+
+PARAGRAPHS = (
+    "First paragraph talks about apples. Apples are red.\n\n"
+    "Second paragraph is about pears and their long history in orchards.\n \n"
+    "Third one is short.\n\n\n"
+    "Fourth paragraph has no terminator and keeps going for a while"
+)
+
+# Expected chunks are the output of the original string-concatenating chunkers
+SENTENCE_CASES = [
+    (60, 0, [
+        "The quick brown fox jumps over the lazy dog.",
+        "It was not amused! Why would it be?",
+        "The fox ran off into the woods. Nobody saw it again.",
+    ]),
+    (60, 30, [
+        "The quick brown fox jumps over the lazy dog.",
+        "jumps over the lazy dog. It was not amused! Why would it be?",
+        "Why would it be? The fox ran off into the woods.",
+        "ran off into the woods. Nobody saw it again.",
+    ]),
+    (60, 10, [
+        "The quick brown fox jumps over the lazy dog.",
+        "lazy dog. It was not amused! Why would it be?",
+        "uld it be? The fox ran off into the woods.",
+        "the woods. Nobody saw it again.",
+    ]),
+    (30, 200, [
+        "The quick brown fox jumps over the lazy dog.",
+        "jumps over the lazy dog. It was not amused!",
+        "jumps over the lazy dog. It was not amused! Why would it be?",
+        "jumps over the lazy dog. It was not amused! Why would it be? The fox ran off into the woods.",
+        "jumps over the lazy dog. It was not amused! Why would it be? The fox ran off into the woods. "
+        "Nobody saw it again.",
+    ]),
+    (1000, 200, [
+        "The quick brown fox jumps over the lazy dog. It was not amused! Why would it be? "
+        "The fox ran off into the woods. Nobody saw it again.",
+    ]),
+]
+
+PARAGRAPH_CASES = [
+    (80, 0, [
+        "First paragraph talks about apples. Apples are red.",
+        "Second paragraph is about pears and their long history in orchards.",
+        "Third one is short.",
+        "Fourth paragraph has no terminator and keeps going for a while",
+    ]),
+    (80, 40, [
+        "First paragraph talks about apples. Apples are red.",
+        "Apples are red.\n\nSecond paragraph is about pears and their long history in orchards.",
+        "ears and their long history in orchards.\n\nThird one is short.",
+        "Third one is short.\n\nFourth paragraph has no terminator and keeps going for a while",
+    ]),
+    (80, 120, [
+        "First paragraph talks about apples. Apples are red.",
+        "Apples are red.\n\nSecond paragraph is about pears and their long history in orchards.",
+        "Apples are red.\n\nSecond paragraph is about pears and their long history in orchards.\n\n"
+        "Third one is short.",
+        " in orchards.\n\nThird one is short.\n\nFourth paragraph has no terminator and keeps going for a while",
+    ]),
+    (70, 15, [
+        "First paragraph talks about apples. Apples are red.",
+        "Apples are red.\n\nSecond paragraph is about pears and their long history in orchards.",
+        "ry in orchards.\n\nThird one is short.",
+        "d one is short.\n\nFourth paragraph has no terminator and keeps going for a while",
+    ]),
+]
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap,expected", SENTENCE_CASES)
+def test_sentence_chunks_match_baseline(chunk_size, chunk_overlap, expected):
+    chunks = chunking_service.ChunkingService().chunk_text(
+        SENTENCES, chunk_size, chunk_overlap, ChunkStrategy.SENTENCE
+    )
+    assert chunks == expected
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap,expected", PARAGRAPH_CASES)
+def test_paragraph_chunks_match_baseline(chunk_size, chunk_overlap, expected):
+    chunks = chunking_service.ChunkingService().chunk_text(
+        PARAGRAPHS, chunk_size, chunk_overlap, ChunkStrategy.PARAGRAPH
+    )
+    assert chunks == expected
+
+
+def test_abbreviations_are_restored_unchanged():
+    sentences = chunking_service.ChunkingService()._split_into_sentences(
+        "Mr. Smith met Dr. Jones. They talked."
+    )
+    assert sentences == ["Mr. Smith met Dr. Jones.", "They talked."]
@@ -0,0 +1,39 @@
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, "llm-training-platform")
+
+file_utils = pytest.importorskip("src.document_ingestion.utils.file_utils")
+
+
+def _spooled(data, max_size):
+    src = tempfile.SpooledTemporaryFile(max_size=max_size)
+    src.write(data)
+    src.seek(0)
+    return src
+
+
+def test_copy_keeps_small_spooled_upload_in_memory(tmp_path):
+    data = b"small upload" * 10
+    src = _spooled(data, max_size=1 << 20)
+    dst_path = tmp_path / "out.bin"
+
+    with open(dst_path, "wb") as dst:
+        file_utils.copy_file_object(src, dst, len(data))
+
+    assert not src._rolled
+    assert dst_path.read_bytes() == data
+
+
+def test_copy_rolled_spooled_upload(tmp_path):
+    data = bytes(range(256)) * 64
+    src = _spooled(data, max_size=16)
+    dst_path = tmp_path / "out.bin"
+
+    with open(dst_path, "wb") as dst:
+        file_utils.copy_file_object(src, dst, len(data), chunk_size=1000)
+
+    assert src._rolled
+    assert dst_path.read_bytes() == data
@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+
+sys.path.insert(0, "llm-training-platform")
+
+fitz = pytest.importorskip("fitz")
+processor_factory = pytest.importorskip("src.document_ingestion.processors.processor_factory")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    settings = processor_factory.settings
+    monkeypatch.setattr(settings.storage, "processing_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings.security, "encryption_master_key", None)
+    return tmp_path / "cache"
+
+
+def _write_pdf(path):
+    image = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+    image.clear_with(200)
+
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), "Cached processing results have the same types as fresh ones.")
+    page.insert_image(fitz.Rect(72, 100, 136, 164), pixmap=image)
+    document.set_metadata({"title": "Cache test", "author": "Tests"})
+    document.save(str(path))
+    document.close()
+
+
+def test_cached_result_matches_fresh_result(tmp_path, cache_dir):
+    pdf_path = tmp_path / "doc.pdf"
+    _write_pdf(pdf_path)
+    output_dir = tmp_path / "out"
+    processor = processor_factory.DocumentProcessor()
+
+    fresh = processor.process_document(pdf_path, output_dir)
+    assert fresh["success"]
+    assert fresh["extracted_images"]
+    assert list(cache_dir.rglob("*.json"))
+
+    cached = processor.process_document(pdf_path, output_dir)
+
+    assert cached == fresh
+    assert [type(path) for path in cached["extracted_images"]] == [type(path) for path in fresh["extracted_images"]]
+
+
+def test_cached_result_with_removed_images_is_stale(tmp_path, cache_dir):
+    pdf_path = tmp_path / "doc.pdf"
+    _write_pdf(pdf_path)
+    output_dir = tmp_path / "out"
+    processor = processor_factory.DocumentProcessor()
+
+    fresh = processor.process_document(pdf_path, output_dir)
+    fresh["extracted_images"][0].unlink()
+
+    cache_path = processor._cache_path(pdf_path, output_dir)
+    assert processor._load_cached_result(cache_path) is None